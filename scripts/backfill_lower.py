@@ -0,0 +1,52 @@
+"""Заполняет name_lower/tag_lower у документов сохранённых до их появления.
+
+Запуск:
+    python -m scripts.backfill_lower
+
+Значения считаются в Python (str.lower), а не через $toLower, который
+корректно работает только с ASCII — в именах кланов бывает кириллица.
+Повторный запуск безопасен: обрабатываются только документы без полей.
+"""
+
+import asyncio
+
+from pymongo import UpdateOne
+
+from utils.database.Mongo import Clan_sessions, Connect, Player_sessions, ensure_indexes
+from utils.settings.logger import LoggerFactory
+
+BATCH_SIZE = 1000
+
+
+async def backfill(repository: type[Connect], fields: dict[str, str]) -> int:
+    """fields: {исходное поле: нормализованное поле}"""
+    collection = repository.collection
+    missing = {"$or": [{target: {"$exists": False}} for target in fields.values()]}
+    projection = {source: 1 for source in fields}
+    updated = 0
+    requests = []
+    async for doc in collection.find(missing, projection=projection):
+        update = {
+            target: repository.lower(doc.get(source))
+            for source, target in fields.items()
+        }
+        requests.append(UpdateOne({"_id": doc["_id"]}, {"$set": update}))
+        if len(requests) >= BATCH_SIZE:
+            updated += (
+                await collection.bulk_write(requests, ordered=False)
+            ).modified_count
+            requests = []
+    if requests:
+        updated += (await collection.bulk_write(requests, ordered=False)).modified_count
+    LoggerFactory.log(f"{collection.name}: обновлено документов {updated}")
+    return updated
+
+
+async def main():
+    await backfill(Player_sessions, {"name": "name_lower"})
+    await backfill(Clan_sessions, {"name": "name_lower", "tag": "tag_lower"})
+    await ensure_indexes()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,460 @@
+"""Локальная замена WG API для нагрузочных прогонов и бенчмарков.
+
+Отдаёт синтетические (или записанные) ответы для N сгенерированных игроков
+по тем же путям что и WG: account/list, account/info, account/achievements,
+tanks/stats, clans/list, clans/info, clans/accountinfo и лидерборд рейтинга.
+
+Запуск:
+    python -m scripts.fake_wg --players 10000 --latency 0.05 --error-rate 0.01
+
+APIServer направляется на заглушку переменной окружения
+    WG_API_BASE=http://127.0.0.1:8081
+Хост исходного адреса переносится в путь: https://api.wotblitz.eu/wotb/...
+уходит на http://127.0.0.1:8081/api.wotblitz.eu/wotb/..., поэтому регион,
+limiter и circuit breaker работают так же как с настоящим API.
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import time
+from collections import defaultdict
+from pathlib import Path
+
+from aiohttp import web
+
+# Идентификаторы танков WG идут с шагом 16
+TANK_IDS = [1 + 16 * i for i in range(400)]
+MEDALS = ["markOfMastery", "warrior", "supporter", "sniper", "mainGun", "medalKay"]
+PLAYERS_PER_CLAN = 50
+
+
+class FakeWG:
+    def __init__(
+        self,
+        players: int = 1000,
+        tanks: int = 100,
+        latency: float = 0.0,
+        error_rate: float = 0.0,
+        limit_rate: float = 0.0,
+        rps: float = 0.0,
+        play_interval: float = 60.0,
+        fixtures: Path | None = None,
+        seed: int = 0,
+    ):
+        self.players = players
+        self.tanks = min(tanks, len(TANK_IDS))
+        self.latency = latency
+        self.error_rate = error_rate
+        self.limit_rate = limit_rate
+        self.rps = rps
+        self.play_interval = play_interval
+        self.seed = seed
+        self.started = time.time()
+        self.random = random.Random(seed)
+        self.fixtures = self._load_fixtures(fixtures)
+        # окно в 1 секунду на каждый application_id
+        self._window: dict[str, tuple[int, int]] = {}
+        self.counters: dict[str, int] = defaultdict(int)
+
+    @staticmethod
+    def _load_fixtures(path: Path | None) -> dict[str, object]:
+        """Записанный элемент data для эндпоинта: <account_info>.json и т.д."""
+        if path is None:
+            return {}
+        return {
+            file.stem: json.loads(file.read_text(encoding="utf-8"))
+            for file in path.glob("*.json")
+        }
+
+    # --- синтетические данные ---
+
+    def account_id(self, index: int) -> int:
+        return 100_000 + index
+
+    def index(self, account_id: int) -> int | None:
+        index = account_id - 100_000
+        return index if 0 <= index < self.players else None
+
+    def nickname(self, index: int) -> str:
+        return f"player{index:06d}"
+
+    def played(self, index: int) -> int:
+        """Боёв сыграно с запуска заглушки: у каждого игрока свой сдвиг."""
+        if not self.play_interval:
+            return 0
+        offset = random.Random(self.seed + index).random() * self.play_interval
+        return int((time.time() - self.started + offset) / self.play_interval)
+
+    def stats(self, rnd: random.Random, battles: int) -> dict:
+        wins = int(battles * rnd.uniform(0.45, 0.65))
+        survived = int(battles * rnd.uniform(0.2, 0.5))
+        shots = int(battles * rnd.uniform(6, 10))
+        return {
+            "spotted": int(battles * rnd.uniform(0.5, 1.5)),
+            "hits": int(shots * rnd.uniform(0.6, 0.85)),
+            "frags": int(battles * rnd.uniform(0.5, 1.2)),
+            "max_xp": rnd.randint(500, 3000),
+            "wins": wins,
+            "losses": battles - wins,
+            "capture_points": int(battles * rnd.uniform(0, 2)),
+            "battles": battles,
+            "damage_dealt": int(battles * rnd.uniform(800, 2500)),
+            "damage_received": int(battles * rnd.uniform(700, 2000)),
+            "max_frags": rnd.randint(1, 7),
+            "shots": shots,
+            "frags8p": int(battles * rnd.uniform(0.1, 0.8)),
+            "xp": int(battles * rnd.uniform(500, 1200)),
+            "win_and_survived": int(min(wins, survived) * 0.8),
+            "survived_battles": survived,
+            "dropped_capture_points": int(battles * rnd.uniform(0, 1)),
+        }
+
+    def player_tanks(self, index: int) -> list[dict]:
+        rnd = random.Random(self.seed + index)
+        count = rnd.randint(max(1, self.tanks // 5), self.tanks)
+        played = self.played(index)
+        now = int(time.time())
+        tanks = []
+        for n, tank_id in enumerate(rnd.sample(TANK_IDS[: self.tanks], count)):
+            # новые бои всегда уходят в первый танк
+            battles = rnd.randint(1, 500) + (played if n == 0 else 0)
+            tanks.append(
+                {
+                    "tank_id": tank_id,
+                    "last_battle_time": now if n == 0 and played else 0,
+                    "battle_life_time": battles * 180,
+                    "in_garage": None,
+                    "mark_of_mastery": rnd.randint(0, 4),
+                    "all": self.stats(
+                        random.Random(self.seed + index + tank_id), battles
+                    ),
+                }
+            )
+        return tanks
+
+    def account(self, index: int) -> dict:
+        tanks = self.player_tanks(index)
+        total = defaultdict(int)
+        for tank in tanks:
+            for key, value in tank["all"].items():
+                total[key] += value
+        total["max_xp"] = max(tank["all"]["max_xp"] for tank in tanks)
+        total["max_frags"] = max(tank["all"]["max_frags"] for tank in tanks)
+        rnd = random.Random(self.seed - index)
+        rating = self.stats(rnd, rnd.randint(0, 300))
+        rating.update(
+            mm_rating=rnd.uniform(20, 80),
+            calibration_battles_left=0,
+            is_recalibration=False,
+            current_season=rnd.randint(1, 60),
+            recalibration_start_time=0,
+        )
+        return {
+            "account_id": self.account_id(index),
+            "nickname": self.nickname(index),
+            "created_at": 1_400_000_000 + index,
+            "updated_at": int(time.time()),
+            "last_battle_time": max(t["last_battle_time"] for t in tanks),
+            "private": None,
+            "statistics": {
+                "clan": {},
+                "frags": {str(t["tank_id"]): t["all"]["frags"] for t in tanks},
+                "all": dict(total),
+                "rating": rating,
+            },
+        }
+
+    def achievements(self, index: int) -> dict:
+        rnd = random.Random(self.seed + 7 * index)
+        medals = {name: rnd.randint(0, 200) + self.played(index) for name in MEDALS}
+        return {"achievements": medals, "max_series": {}}
+
+    def clan(self, clan_id: int) -> dict | None:
+        first = (clan_id - 1) * PLAYERS_PER_CLAN
+        if clan_id < 1 or first >= self.players:
+            return None
+        members = [
+            self.account_id(i)
+            for i in range(first, min(first + PLAYERS_PER_CLAN, self.players))
+        ]
+        return {
+            "clan_id": clan_id,
+            "name": f"clan{clan_id}",
+            "tag": f"C{clan_id}",
+            "created_at": 1_400_000_000 + clan_id,
+            "creator_id": members[0],
+            "creator_name": self.nickname(self.index(members[0])),
+            "description": "",
+            "emblem_set_id": 0,
+            "members_count": len(members),
+            "members_ids": members,
+            "motto": "",
+            "old_name": None,
+            "old_tag": None,
+        }
+
+    # --- ответы ---
+
+    def fixture(self, name: str, item, account_id: int):
+        recorded = self.fixtures.get(name)
+        if recorded is None or item is None:
+            return item
+        if isinstance(recorded, dict) and "account_id" in recorded:
+            return {**recorded, "account_id": account_id, "nickname": item["nickname"]}
+        return recorded
+
+    @staticmethod
+    def select(item, fields: str):
+        """Упрощённый параметр fields WG: `a,b.c` или `-a.b`."""
+        if not fields or item is None:
+            return item
+        if isinstance(item, list):
+            return [FakeWG.select(element, fields) for element in item]
+        names = [name.strip() for name in fields.split(",") if name.strip()]
+        if all(name.startswith("-") for name in names):
+            item = json.loads(json.dumps(item))
+            for name in names:
+                *path, last = name[1:].split(".")
+                node = item
+                for key in path:
+                    node = node.get(key, {})
+                node.pop(last, None)
+            return item
+        result: dict = {}
+        for name in names:
+            *path, last = name.lstrip("-").split(".")
+            source, target = item, result
+            for key in path:
+                source = source.get(key) or {}
+                target = target.setdefault(key, {})
+            if last in source:
+                target[last] = source[last]
+        return result
+
+    @staticmethod
+    def ok(data, count: int | None = None) -> web.Response:
+        meta = {"count": count if count is not None else len(data)}
+        return web.json_response({"status": "ok", "meta": meta, "data": data})
+
+    @staticmethod
+    def error(message: str, code: int = 407) -> web.Response:
+        return web.json_response(
+            {"status": "error", "error": {"message": message, "code": code}}
+        )
+
+    def ids(self, request: web.Request, key: str = "account_id") -> list[int]:
+        return [int(i) for i in request.query.get(key, "").split(",") if i.strip()]
+
+    async def account_list(self, request: web.Request) -> web.Response:
+        search = request.query.get("search", "").lower()
+        exact = request.query.get("type", "startswith") == "exact"
+        limit = int(request.query.get("limit", 100))
+        found = []
+        if search.startswith("player"):
+            for index in range(self.players):
+                name = self.nickname(index)
+                if (name == search) if exact else name.startswith(search):
+                    found.append(
+                        {"nickname": name, "account_id": self.account_id(index)}
+                    )
+                    if len(found) >= limit:
+                        break
+        return self.ok(found)
+
+    async def account_info(self, request: web.Request) -> web.Response:
+        fields = request.query.get("fields", "")
+        data = {}
+        for account_id in self.ids(request):
+            index = self.index(account_id)
+            item = self.account(index) if index is not None else None
+            item = self.fixture("account_info", item, account_id)
+            data[str(account_id)] = self.select(item, fields)
+        return self.ok(data)
+
+    async def achievements_info(self, request: web.Request) -> web.Response:
+        data = {}
+        for account_id in self.ids(request):
+            index = self.index(account_id)
+            item = self.achievements(index) if index is not None else None
+            data[str(account_id)] = self.fixture(
+                "account_achievements", item, account_id
+            )
+        return self.ok(data)
+
+    async def tanks_stats(self, request: web.Request) -> web.Response:
+        fields = request.query.get("fields", "")
+        data = {}
+        for account_id in self.ids(request):
+            index = self.index(account_id)
+            item = self.player_tanks(index) if index is not None else None
+            item = self.fixture("tanks_stats", item, account_id)
+            data[str(account_id)] = self.select(item, fields)
+        return self.ok(data)
+
+    async def clans_list(self, request: web.Request) -> web.Response:
+        search = request.query.get("search", "").lower()
+        found = []
+        for clan_id in range(1, self.players // PLAYERS_PER_CLAN + 2):
+            clan = self.clan(clan_id)
+            if clan and (
+                clan["name"].startswith(search) or clan["tag"].lower() == search
+            ):
+                found.append(
+                    {
+                        key: clan[key]
+                        for key in (
+                            "clan_id",
+                            "name",
+                            "tag",
+                            "created_at",
+                            "members_count",
+                        )
+                    }
+                )
+            if len(found) >= 100:
+                break
+        return self.ok(found)
+
+    async def clans_info(self, request: web.Request) -> web.Response:
+        data = {
+            str(clan_id): self.clan(clan_id) for clan_id in self.ids(request, "clan_id")
+        }
+        return self.ok(data)
+
+    async def clans_accountinfo(self, request: web.Request) -> web.Response:
+        data = {}
+        for account_id in self.ids(request):
+            index = self.index(account_id)
+            if index is None:
+                data[str(account_id)] = None
+                continue
+            clan_id = index // PLAYERS_PER_CLAN + 1
+            data[str(account_id)] = {
+                "account_id": account_id,
+                "clan_id": clan_id,
+                "role": "private",
+                "joined_at": 1_500_000_000,
+                "clan": self.clan(clan_id),
+            }
+        return self.ok(data)
+
+    async def leaderboard(self, request: web.Request) -> web.Response:
+        index = self.index(int(request.match_info["player_id"]))
+        if index is None:
+            return web.json_response({"neighbors": []})
+        rnd = random.Random(self.seed - index)
+        return web.json_response(
+            {
+                "neighbors": [
+                    {
+                        "spa_id": self.account_id(index),
+                        "nickname": self.nickname(index),
+                        "score": rnd.randint(2000, 6000),
+                        "number": index + 1,
+                    }
+                ]
+            }
+        )
+
+    # --- инъекция задержек и ошибок ---
+
+    def over_limit(self, app_id: str) -> bool:
+        if not self.rps:
+            return False
+        second = int(time.monotonic())
+        start, count = self._window.get(app_id, (second, 0))
+        if start != second:
+            start, count = second, 0
+        self._window[app_id] = (start, count + 1)
+        return count + 1 > self.rps
+
+    @web.middleware
+    async def chaos(self, request: web.Request, handler) -> web.StreamResponse:
+        self.counters["requests"] += 1
+        if self.latency:
+            await asyncio.sleep(self.latency * self.random.uniform(0.5, 1.5))
+        app_id = request.query.get("application_id", "")
+        if self.over_limit(app_id) or self.random.random() < self.limit_rate:
+            self.counters["limit"] += 1
+            return self.error("REQUEST_LIMIT_EXCEEDED", 407)
+        if self.random.random() < self.error_rate:
+            self.counters["errors"] += 1
+            if self.random.random() < 0.5:
+                return web.Response(status=504)
+            return self.error("SOURCE_NOT_AVAILABLE", 504)
+        return await handler(request)
+
+    async def metrics(self, request: web.Request) -> web.Response:
+        return web.json_response(dict(self.counters))
+
+    def app(self) -> web.Application:
+        app = web.Application(middlewares=[self.chaos])
+        routes = {
+            "account/list": self.account_list,
+            "account/info": self.account_info,
+            "account/achievements": self.achievements_info,
+            "tanks/stats": self.tanks_stats,
+            "clans/list": self.clans_list,
+            "clans/info": self.clans_info,
+            "clans/accountinfo": self.clans_accountinfo,
+        }
+        for path, handler in routes.items():
+            app.router.add_get(f"/{{host}}/wotb/{path}/", handler)
+        app.router.add_get(
+            "/{host}/uk/api/rating-leaderboards/user/{player_id}", self.leaderboard
+        )
+        app.router.add_get("/_fake/metrics", self.metrics)
+        return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8081)
+    parser.add_argument("--players", type=int, default=1000)
+    parser.add_argument(
+        "--tanks", type=int, default=100, help="максимум танков у игрока"
+    )
+    parser.add_argument(
+        "--latency", type=float, default=0.0, help="средняя задержка, с"
+    )
+    parser.add_argument(
+        "--error-rate", type=float, default=0.0, help="доля 504/SOURCE_NOT_AVAILABLE"
+    )
+    parser.add_argument(
+        "--limit-rate", type=float, default=0.0, help="доля REQUEST_LIMIT_EXCEEDED"
+    )
+    parser.add_argument(
+        "--rps",
+        type=float,
+        default=0.0,
+        help="квота на application_id в секунду, 0 — без квоты",
+    )
+    parser.add_argument(
+        "--play-interval",
+        type=float,
+        default=60.0,
+        help="раз в сколько секунд игрок проводит бой, 0 — никогда",
+    )
+    parser.add_argument("--fixtures", type=Path, help="каталог с записанными ответами")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    fake = FakeWG(
+        players=args.players,
+        tanks=args.tanks,
+        latency=args.latency,
+        error_rate=args.error_rate,
+        limit_rate=args.limit_rate,
+        rps=args.rps,
+        play_interval=args.play_interval,
+        fixtures=args.fixtures,
+        seed=args.seed,
+    )
+    web.run_app(fake.app(), host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+from typing import Any, Awaitable, Callable
+
+from prometheus_client import Counter
+
+from utils.error.exception import Overloaded
+from utils.settings.config import EnvConfig
+
+from . import deadline
+from .app_pool import REGION_ALIASES
+from .limiter import current_priority
+from .wotb import APIServer
+
+admission_counter = Counter(
+    "admission_decisions",
+    "Admission decisions for requests that need WG calls",
+    ["scope", "decision"],
+)
+
+
+class AdmissionController:
+    """Не пускает запрос в очередь limiter, если он не успеет в свой срок.
+
+    Ожидание оценивается по очереди limiter региона: запросы того же или
+    более приоритетного класса впереди плюс `cost` вызовов самого запроса,
+    делённые на текущую скорость. Если оценка больше `headroom` от
+    оставшегося срока, запрос получает устаревший результат из кеша или 503
+    с Retry-After.
+    """
+
+    def __init__(self, headroom: float = EnvConfig.ADMISSION_HEADROOM):
+        self.headroom = headroom
+        self.decisions: dict[str, dict[str, int]] = {}
+
+    def estimate(self, region: str, cost: int = 1) -> float:
+        api = APIServer()
+        region = region.lower()
+        region = REGION_ALIASES.get(region, region)
+        priority = current_priority()
+        waits = [
+            api.limiter.bucket(region, app_id=app.app_id).wait_estimate(priority, cost)
+            for app in api.app_ids.apps
+            if app.serves(region)
+        ]
+        return min(waits, default=0.0)
+
+    def record(self, scope: str, decision: str):
+        admission_counter.labels(scope=scope, decision=decision).inc()
+        scope_stats = self.decisions.setdefault(scope, {})
+        scope_stats[decision] = scope_stats.get(decision, 0) + 1
+
+    async def admit(
+        self,
+        scope: str,
+        region: str,
+        cost: int = 1,
+        stale: Callable[[], Awaitable[Any]] | None = None,
+    ) -> Any:
+        """None если запрос принят, иначе устаревший результат из `stale`.
+
+        Overloaded если запрос не успевает и устаревшего результата нет.
+        """
+        budget = deadline.remaining()
+        wait = self.estimate(region, cost)
+        if budget is None or wait <= budget * self.headroom:
+            self.record(scope, "admit")
+            return None
+        if stale is not None:
+            data = await stale()
+            if data is not None:
+                self.record(scope, "stale")
+                return data
+        self.record(scope, "shed")
+        raise Overloaded(retry_after=wait, region=region)
+
+    def stats(self) -> dict[str, dict[str, int]]:
+        return self.decisions
+
+
+admission = AdmissionController()
@@ -0,0 +1,177 @@
+import time
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from utils.error.exception import InvalidApplicationId
+from utils.settings.config import EnvConfig
+from utils.settings.logger import LoggerFactory
+
+from .limiter import LimiterRegistry
+
+# Регион в настройках -> регион в адресе WG API (game_api.reg_urls)
+REGION_ALIASES = {"eu": "eu", "na": "com", "com": "com", "asia": "asia", "as": "asia"}
+
+
+class AppId:
+    def __init__(self, app_id: str, regions: set[str] | None = None):
+        self.app_id = app_id
+        # None — приложение работает во всех регионах
+        self.regions = regions
+        self.active = True
+        self.reason: str | None = None
+        # time.monotonic(), после которого приложение возвращается в ротацию
+        self.disabled_until = 0.0
+        self.uses = 0
+
+    def covers(self, region: str) -> bool:
+        return self.regions is None or region in self.regions
+
+    def serves(self, region: str) -> bool:
+        return self.active and self.covers(region)
+
+
+def parse_app_ids(*values: str | None) -> list[AppId]:
+    """Разбирает `id1,eu:id2,asia:id2` в список AppId.
+
+    Один id может быть привязан к нескольким регионам.
+    """
+    apps: dict[str, AppId] = {}
+    for value in values:
+        for item in (value or "").split(","):
+            item = item.strip()
+            if not item:
+                continue
+            region, _, app_id = item.rpartition(":")
+            app = apps.setdefault(app_id, AppId(app_id, set() if region else None))
+            if region and app.regions is not None:
+                app.regions.add(REGION_ALIASES.get(region.lower(), region.lower()))
+            elif not region:
+                app.regions = None
+    return list(apps.values())
+
+
+def replace_app_id(url: str, app_id: str) -> str:
+    parts = urlsplit(url)
+    query = [
+        (key, app_id if key == "application_id" else value)
+        for key, value in parse_qsl(parts.query, keep_blank_values=True)
+    ]
+    return urlunsplit(parts._replace(query=urlencode(query, safe=",")))
+
+
+class AppIdPool:
+    """Пул application_id WG.
+
+    Для каждого запроса выбирается приложение региона с наименьшей
+    ожидаемой очередью в его limiter. Заблокированные приложения
+    (APPLICATION_IS_BLOCKED, INVALID_IP_ADDRESS) выводятся из ротации
+    на `cooldown` секунд; последнее приложение региона не выводится.
+    """
+
+    def __init__(
+        self,
+        limiter: LimiterRegistry,
+        apps: list[AppId] | None = None,
+        cooldown: float = EnvConfig.APP_ID_COOLDOWN,
+    ):
+        self.limiter = limiter
+        self.apps = apps or parse_app_ids(EnvConfig.WG_APP_IDS, EnvConfig.LT_APP_IDS)
+        self.cooldown = cooldown
+
+    def _revive(self):
+        now = time.monotonic()
+        for app in self.apps:
+            if not app.active and app.disabled_until <= now:
+                app.active = True
+                LoggerFactory.log(
+                    f"application_id {app.app_id[:6]}… возвращён в ротацию "
+                    f"после {app.reason}",
+                    level="WARNING",
+                    channel="api",
+                )
+                app.reason = None
+
+    def choose(self, region: str, exclude: str | None = None) -> str:
+        region = REGION_ALIASES.get(region.lower(), region.lower())
+        self._revive()
+        candidates = [
+            app for app in self.apps if app.serves(region) and app.app_id != exclude
+        ]
+        if not candidates:
+            raise InvalidApplicationId(
+                message="Нет доступных application_id", region=region
+            )
+        # при равной очереди распределяем запросы по очереди
+        app = min(
+            candidates,
+            key=lambda app: (
+                self.limiter.bucket(region, app_id=app.app_id).expected_wait,
+                app.uses,
+            ),
+        )
+        app.uses += 1
+        return app.app_id
+
+    def _last_for_region(self, app: AppId) -> str | None:
+        """Регион, в котором кроме app не осталось активных приложений."""
+        regions = app.regions or set(REGION_ALIASES.values())
+        for region in sorted(regions):
+            if not any(
+                other is not app and other.serves(region) for other in self.apps
+            ):
+                return region
+        return None
+
+    def disable(self, app_id: str, reason: str) -> bool:
+        """Выводит приложение из ротации. False если оно последнее в регионе."""
+        for app in self.apps:
+            if app.app_id != app_id or not app.active:
+                continue
+            if region := self._last_for_region(app):
+                LoggerFactory.log(
+                    f"application_id {app_id[:6]}…: {reason}, но это последнее "
+                    f"приложение региона {region}, остаётся в ротации",
+                    level="CRITICAL",
+                    channel="api",
+                )
+                return False
+            app.active = False
+            app.reason = reason
+            app.disabled_until = time.monotonic() + self.cooldown
+            LoggerFactory.log(
+                f"application_id {app_id[:6]}… выведен из ротации на "
+                f"{self.cooldown:.0f}с: {reason}",
+                level="CRITICAL",
+                channel="api",
+            )
+        return True
+
+    def rotate(self, url: str, reason: str) -> str | None:
+        """Выводит application_id из url из ротации и подставляет другой.
+
+        None если в регионе запроса других приложений нет.
+        """
+        parts = urlsplit(url)
+        app_id = dict(parse_qsl(parts.query)).get("application_id")
+        self.disable(app_id, reason)
+        region = LimiterRegistry.key(url)[0]
+        try:
+            return replace_app_id(url, self.choose(region, exclude=app_id))
+        except InvalidApplicationId:
+            return None
+
+    def stats(self) -> list[dict]:
+        return [
+            {
+                "app_id": f"{app.app_id[:6]}…",
+                "regions": sorted(app.regions) if app.regions else ["*"],
+                "active": app.active,
+                "reason": app.reason,
+                "retry_in": (
+                    None
+                    if app.active
+                    else max(0, round(app.disabled_until - time.monotonic()))
+                ),
+                "uses": app.uses,
+            }
+            for app in self.apps
+        ]
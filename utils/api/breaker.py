@@ -0,0 +1,107 @@
+import re
+import time
+from urllib.parse import urlsplit
+
+from utils.error.exception import CircuitOpen
+from utils.settings.config import EnvConfig
+from utils.settings.logger import LoggerFactory
+
+
+class CircuitBreaker:
+    """Circuit breaker для одного внешнего эндпоинта.
+
+    closed — запросы идут, считаем ошибки подряд;
+    open — после `failures` ошибок запросы сразу отклоняются на `reset_timeout`;
+    half_open — пропускаем один пробный запрос, по его итогу closed или open.
+    Пробный запрос без итога дольше `probe_timeout` считается потерянным.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+        self,
+        name: str,
+        failures: int = EnvConfig.BREAKER_FAILURES,
+        reset_timeout: float = EnvConfig.BREAKER_RESET_TIMEOUT,
+        probe_timeout: float = EnvConfig.API_TIMEOUT,
+    ):
+        self.name = name
+        self.max_failures = failures
+        self.reset_timeout = reset_timeout
+        self.probe_timeout = probe_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probe = False
+        self._probe_at = 0.0
+
+    def allow(self) -> bool:
+        if self.state == self.CLOSED:
+            return True
+        if self.state == self.OPEN:
+            if time.monotonic() - self.opened_at < self.reset_timeout:
+                return False
+            self.state = self.HALF_OPEN
+            self._probe = False
+        now = time.monotonic()
+        if self._probe and now - self._probe_at < self.probe_timeout:
+            return False
+        self._probe = True
+        self._probe_at = now
+        return True
+
+    def success(self):
+        if self.state != self.CLOSED:
+            LoggerFactory.log(f"Circuit {self.name} закрыт", channel="api")
+        self.state = self.CLOSED
+        self.failures = 0
+        self._probe = False
+
+    def failure(self):
+        self.failures += 1
+        if self.state == self.HALF_OPEN or self.failures >= self.max_failures:
+            if self.state != self.OPEN:
+                LoggerFactory.log(
+                    f"Circuit {self.name} открыт после {self.failures} ошибок",
+                    level="WARNING",
+                    channel="api",
+                )
+            self.state = self.OPEN
+            self.opened_at = time.monotonic()
+            self._probe = False
+
+    def release(self):
+        """Пробный запрос завершился без результата (например отменён)."""
+        self._probe = False
+
+    def check(self):
+        if not self.allow():
+            raise CircuitOpen(endpoint=self.name)
+
+    def stats(self) -> dict[str, str | int]:
+        return {"state": self.state, "failures": self.failures}
+
+
+class BreakerRegistry:
+    """Отдельный CircuitBreaker на каждый эндпоинт (хост + путь без id)."""
+
+    def __init__(self):
+        self._breakers: dict[str, CircuitBreaker] = {}
+
+    @staticmethod
+    def key(url: str) -> str:
+        parts = urlsplit(url)
+        path = re.sub(r"/\d+(?=/|$)", "/{id}", parts.path)
+        return f"{parts.netloc.lower()}{path}"
+
+    def get(self, url: str) -> CircuitBreaker:
+        key = self.key(url)
+        breaker = self._breakers.get(key)
+        if breaker is None:
+            breaker = self._breakers[key] = CircuitBreaker(key)
+        return breaker
+
+    def stats(self) -> dict[str, dict[str, str | int]]:
+        return {key: breaker.stats() for key, breaker in self._breakers.items()}
@@ -0,0 +1,47 @@
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from utils.error.exception import DeadlineExceeded
+
+# Абсолютный срок (time.monotonic) до которого должен завершиться текущий запрос
+_deadline: ContextVar[float | None] = ContextVar("wg_deadline", default=None)
+
+
+def remaining() -> float | None:
+    """Сколько секунд осталось у текущего запроса, None если срока нет."""
+    deadline = _deadline.get()
+    if deadline is None:
+        return None
+    return deadline - time.monotonic()
+
+
+def check() -> float | None:
+    """Остаток бюджета; DeadlineExceeded если он уже исчерпан."""
+    left = remaining()
+    if left is not None and left <= 0:
+        raise DeadlineExceeded()
+    return left
+
+
+def timeout(default: float | None = None) -> float | None:
+    """Таймаут для одного вызова: остаток бюджета, но не больше default."""
+    left = check()
+    if left is None:
+        return default
+    return left if default is None else min(left, default)
+
+
+@contextmanager
+def deadline(seconds: float):
+    """Ограничивает все вложенные вызовы WG сроком в seconds.
+
+    Вложенный срок не может быть дальше внешнего.
+    """
+    new = time.monotonic() + seconds
+    current = _deadline.get()
+    token = _deadline.set(new if current is None else min(current, new))
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
@@ -0,0 +1,47 @@
+from enum import Enum
+
+from pydantic import BaseModel
+
+from utils.models.tank import MemberModel, PlayerActivity, PlayerModel
+
+
+class FieldProfile(str, Enum):
+    """Набор полей который запрашиваем у WG через параметр fields."""
+
+    FULL = "full"
+    SESSION = "session"
+    CLAN_MEMBER = "clan-member"
+    CHANGE_CHECK = "change-check"
+
+
+# account/info. statistics.frags — словарь по каждому танку, он нигде не нужен
+ACCOUNT_FIELDS: dict[FieldProfile, str] = {
+    FieldProfile.FULL: "-statistics.clan",
+    FieldProfile.SESSION: "-statistics.clan,-statistics.frags",
+    FieldProfile.CLAN_MEMBER: (
+        "account_id,nickname,last_battle_time,statistics.all,statistics.rating"
+    ),
+    FieldProfile.CHANGE_CHECK: "account_id,nickname,last_battle_time,updated_at",
+}
+
+# Модель в которую разбираем account/info для каждого профиля
+ACCOUNT_MODELS: dict[FieldProfile, type[BaseModel]] = {
+    FieldProfile.FULL: PlayerModel,
+    FieldProfile.SESSION: PlayerModel,
+    FieldProfile.CLAN_MEMBER: MemberModel,
+    FieldProfile.CHANGE_CHECK: PlayerActivity,
+}
+
+# tanks/stats
+TANK_FIELDS: dict[FieldProfile, str] = {
+    FieldProfile.FULL: "",
+    FieldProfile.SESSION: "tank_id,last_battle_time,battle_life_time,in_garage,all",
+}
+
+
+def account_fields(profile: FieldProfile) -> str:
+    return ACCOUNT_FIELDS[profile]
+
+
+def tank_fields(profile: FieldProfile) -> str:
+    return TANK_FIELDS.get(profile, TANK_FIELDS[FieldProfile.SESSION])
@@ -0,0 +1,237 @@
+import asyncio
+from collections import deque
+from contextvars import ContextVar
+from enum import IntEnum
+from typing import Hashable
+from urllib.parse import parse_qsl, urlsplit
+
+from asynciolimiter import Limiter
+
+from utils.settings.config import EnvConfig
+from utils.settings.logger import LoggerFactory
+
+from .redis_limiter import RedisTokenBucket
+
+
+class Priority(IntEnum):
+    """Класс вызывающего: чем меньше значение, тем раньше проходит запрос."""
+
+    INTERACTIVE = 0
+    WEBSOCKET = 1
+    CLIENT = 2
+    BULK = 3
+
+
+_lane: ContextVar[tuple[Priority, Hashable]] = ContextVar(
+    "wg_lane", default=(Priority.INTERACTIVE, None)
+)
+
+
+def set_priority(priority: Priority, flow: Hashable = None):
+    """Класс и поток (клиент, задача) для WG вызовов текущего контекста."""
+    _lane.set((priority, flow))
+
+
+def current_priority() -> Priority:
+    return _lane.get()[0]
+
+
+class AdaptiveLimiter:
+    """Limiter со скоростью по AIMD и очередями по приоритету.
+
+    Пока запросы проходят, скорость растёт на `increase` за каждый успешный
+    ответ. На REQUEST_LIMIT_EXCEEDED/504 скорость умножается на `decrease`.
+    Следующим к limiter допускается ожидающий из самого приоритетного класса,
+    внутри класса потоки обслуживаются по кругу. Если задан `distributed`,
+    после локального limiter берётся ещё и токен из общего bucket в Redis.
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        min_rate: float,
+        max_rate: float,
+        increase: float,
+        decrease: float,
+        distributed: RedisTokenBucket | None = None,
+    ):
+        self.distributed = distributed
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.increase = increase
+        self.decrease = decrease
+        self.limiter = Limiter(rate)
+        self.waiting = 0
+        self._lanes: dict[Priority, dict[Hashable, deque[asyncio.Future]]] = {}
+        self._busy = False
+
+    @property
+    def rate(self) -> float:
+        return self.limiter.rate
+
+    def _set_rate(self, rate: float):
+        self.limiter.rate = min(self.max_rate, max(self.min_rate, rate))
+
+    async def wait(self):
+        priority, flow = _lane.get()
+        turn = asyncio.get_running_loop().create_future()
+        flows = self._lanes.setdefault(priority, {})
+        flows.setdefault(flow, deque()).append(turn)
+        self.waiting += 1
+        try:
+            self._dispatch()
+            try:
+                await turn
+            except asyncio.CancelledError:
+                if turn.done() and not turn.cancelled():
+                    self._release()
+                raise
+            try:
+                await self.limiter.wait()
+                if self.distributed:
+                    await self.distributed.acquire()
+            finally:
+                self._release()
+        finally:
+            self.waiting -= 1
+
+    def _release(self):
+        self._busy = False
+        self._dispatch()
+
+    def _dispatch(self):
+        if self._busy:
+            return
+        for priority in sorted(self._lanes):
+            flows = self._lanes[priority]
+            while flows:
+                flow = next(iter(flows))
+                queue = flows.pop(flow)
+                while queue and queue[0].done():
+                    queue.popleft()
+                if not queue:
+                    continue
+                turn = queue.popleft()
+                if queue:
+                    # поток уходит в конец круга
+                    flows[flow] = queue
+                self._busy = True
+                turn.set_result(None)
+                return
+
+    def depth(self) -> dict[str, int]:
+        return {
+            priority.name.lower(): sum(
+                1 for queue in flows.values() for turn in queue if not turn.done()
+            )
+            for priority, flows in sorted(self._lanes.items())
+        }
+
+    def wait_estimate(self, priority: Priority, cost: int = 1) -> float:
+        """Ожидание для `cost` новых запросов класса priority: их обгоняют
+        только запросы того же или более приоритетного класса."""
+        ahead = sum(
+            1
+            for lane, flows in self._lanes.items()
+            if lane <= priority
+            for queue in flows.values()
+            for turn in queue
+            if not turn.done()
+        )
+        return (ahead + int(self._busy) + cost) / self.rate
+
+    @property
+    def expected_wait(self) -> float:
+        """Оценка ожидания нового запроса в секундах."""
+        return (self.waiting + 1) / self.rate
+
+    def success(self):
+        if self.rate < self.max_rate:
+            self._set_rate(self.rate + self.increase)
+
+    def backoff(self):
+        self._set_rate(self.rate * self.decrease)
+
+    def stats(self) -> dict[str, float]:
+        data = {"rate": round(self.rate, 2), "queue": self.waiting, **self.depth()}
+        if self.distributed:
+            data.update(self.distributed.stats())
+        return data
+
+
+# Общее имя хоста для всех запросов с application_id
+API_HOST = "api"
+
+
+class LimiterRegistry:
+    """Отдельный AdaptiveLimiter на каждый (регион, application_id).
+
+    Квота WG считается на приложение, поэтому все хосты API региона с одним
+    application_id делят один limiter. У сайта с рейтингом application_id
+    нет, там limiter на (регион, хост).
+    """
+
+    def __init__(
+        self,
+        rate: float = EnvConfig.LIMIT,
+        min_rate: float = EnvConfig.LIMIT_MIN,
+        max_rate: float = EnvConfig.LIMIT_MAX,
+        increase: float = EnvConfig.LIMIT_INCREASE,
+        decrease: float = EnvConfig.LIMIT_DECREASE,
+        distributed: bool = EnvConfig.REDIS_LIMITER,
+    ):
+        self.distributed = distributed
+        self.params = dict(
+            rate=rate,
+            min_rate=min_rate,
+            max_rate=max(max_rate, rate),
+            increase=increase,
+            decrease=decrease,
+        )
+        self._buckets: dict[tuple[str, str, str | None], AdaptiveLimiter] = {}
+
+    @staticmethod
+    def key(url: str, app_id: str | None = None) -> tuple[str, str, str | None]:
+        parts = urlsplit(url)
+        host = parts.netloc.lower()
+        labels = host.split(".")
+        # api.wotblitz.eu -> eu, eu.wotblitz.com -> eu
+        region = labels[-1] if labels[0] == "api" else labels[0]
+        if app_id is None:
+            app_id = dict(parse_qsl(parts.query)).get("application_id")
+        return region, API_HOST if app_id else host, app_id
+
+    def bucket(
+        self, region: str, host: str = API_HOST, app_id: str | None = None
+    ) -> AdaptiveLimiter:
+        key = (region, host, app_id)
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            distributed = None
+            if self.distributed:
+                distributed = RedisTokenBucket(
+                    key=f"{region}:{app_id or host}", rate=self.params["rate"]
+                )
+            bucket = self._buckets[key] = AdaptiveLimiter(
+                **self.params, distributed=distributed
+            )
+        return bucket
+
+    def get(self, url: str, app_id: str | None = None) -> AdaptiveLimiter:
+        return self.bucket(*self.key(url, app_id))
+
+    def backoff(self, url: str, app_id: str | None = None):
+        bucket = self.get(url, app_id)
+        bucket.backoff()
+        LoggerFactory.log(
+            f"Снижение скорости запросов {self.key(url, app_id)[:2]} "
+            f"до {bucket.rate:.2f}/с",
+            level="WARNING",
+            channel="api",
+        )
+
+    def stats(self) -> dict[str, dict[str, float]]:
+        return {
+            ":".join([region, host] + ([app_id[:6]] if app_id else [])): bucket.stats()
+            for (region, host, app_id), bucket in self._buckets.items()
+        }
@@ -0,0 +1,55 @@
+import json
+import time
+
+from redis.exceptions import RedisError
+
+from utils.cache.redis_cache import RedisCache
+from utils.settings.config import EnvConfig
+from utils.settings.logger import LoggerFactory
+
+NO_RATING = {"score": 0, "number": 0}
+
+
+class RatingCache:
+    """Место игрока в рейтинговом лидерборде в Redis.
+
+    Запись свежая `fresh_ttl` секунд, после этого ещё `ttl` отдаётся как
+    устаревшая, пока её обновляют в фоне.
+    """
+
+    def __init__(
+        self,
+        cache: RedisCache | None = None,
+        fresh_ttl: int = EnvConfig.RATING_CACHE_FRESH,
+        ttl: int = EnvConfig.RATING_CACHE_TTL,
+    ):
+        self.cache = cache or RedisCache()
+        self.fresh_ttl = fresh_ttl
+        self.ttl = ttl
+
+    @staticmethod
+    def key(region: str, player_id: int) -> str:
+        return f"rating:{region}:{player_id}"
+
+    async def get(self, region: str, player_id: int) -> tuple[dict | None, bool]:
+        """(место, свежее ли оно); (None, False) если записи нет."""
+        try:
+            data = await self.cache.get(self.key(region, player_id))
+        except (RedisError, OSError) as e:
+            LoggerFactory.log(
+                f"Кеш рейтинга недоступен: {e!r}", level="WARNING", channel="api"
+            )
+            return None, False
+        if not data:
+            return None, False
+        fresh = time.time() - data.pop("ts", 0) < self.fresh_ttl
+        return data, fresh
+
+    async def set(self, region: str, player_id: int, rating: dict):
+        value = json.dumps({**rating, "ts": int(time.time())})
+        try:
+            await self.cache.set(self.key(region, player_id), value, expire=self.ttl)
+        except (RedisError, OSError) as e:
+            LoggerFactory.log(
+                f"Кеш рейтинга недоступен: {e!r}", level="WARNING", channel="api"
+            )
@@ -0,0 +1,97 @@
+import asyncio
+import time
+
+from redis.exceptions import RedisError
+
+from utils.cache.redis_cache import RedisCache
+from utils.settings.config import EnvConfig
+from utils.settings.logger import LoggerFactory
+
+# Token bucket в hash {tokens, ts}. Время берём у Redis, чтобы часы
+# воркеров на разных нодах не влияли на скорость.
+# Возвращает {выдано токенов, сколько ждать до следующего токена}.
+TOKEN_BUCKET_SCRIPT = """
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local requested = tonumber(ARGV[3])
+local now = redis.call('TIME')
+now = tonumber(now[1]) + tonumber(now[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or burst
+local ts = tonumber(state[2]) or now
+tokens = math.min(burst, tokens + math.max(0, now - ts) * rate)
+local granted = math.min(requested, math.floor(tokens))
+tokens = tokens - granted
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+redis.call('EXPIRE', KEYS[1], math.ceil(burst / rate) + 60)
+local wait = 0
+if granted == 0 then
+    wait = (1 - tokens) / rate
+end
+return {granted, tostring(wait)}
+"""
+
+
+class RedisTokenBucket:
+    """Token bucket в Redis, общий для всех воркеров и нод.
+
+    За один вызов скрипта берётся до `prefetch` токенов, они расходуются
+    локально. Неизрасходованные токены старше `prefetch_ttl` выбрасываются,
+    чтобы один воркер не копил квоту остальных.
+    """
+
+    def __init__(
+        self,
+        key: str,
+        rate: float = EnvConfig.LIMIT,
+        burst: int = EnvConfig.REDIS_LIMITER_BURST,
+        prefetch: int = EnvConfig.REDIS_LIMITER_PREFETCH,
+        prefetch_ttl: float = 1.0,
+        cache: RedisCache | None = None,
+    ):
+        self.key = f"limiter:{key}"
+        self.rate = rate
+        self.burst = max(burst, prefetch)
+        self.prefetch = prefetch
+        self.prefetch_ttl = prefetch_ttl
+        self.cache = cache or RedisCache()
+        self._script = None
+        self._tokens = 0
+        self._fetched_at = 0.0
+        self._lock = asyncio.Lock()
+        self.round_trips = 0
+
+    async def _take(self) -> tuple[int, float]:
+        if self._script is None:
+            await self.cache.connect()
+            self._script = self.cache.redis.register_script(TOKEN_BUCKET_SCRIPT)
+        self.round_trips += 1
+        granted, wait = await self._script(
+            keys=[self.key], args=[self.rate, self.burst, self.prefetch]
+        )
+        return int(granted), float(wait)
+
+    async def acquire(self):
+        async with self._lock:
+            if time.monotonic() - self._fetched_at > self.prefetch_ttl:
+                self._tokens = 0
+            while self._tokens == 0:
+                try:
+                    granted, wait = await self._take()
+                except (RedisError, OSError) as e:
+                    # без Redis остаётся только локальный limiter
+                    LoggerFactory.log(
+                        f"Общий limiter {self.key} недоступен: {e!r}",
+                        level="WARNING",
+                        channel="api",
+                    )
+                    return
+                if granted:
+                    self._tokens = granted
+                    self._fetched_at = time.monotonic()
+                else:
+                    await asyncio.sleep(wait)
+            self._tokens -= 1
+
+    def stats(self) -> dict[str, float]:
+        return {"prefetched": self._tokens, "round_trips": self.round_trips}
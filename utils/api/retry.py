@@ -0,0 +1,67 @@
+import asyncio
+import random
+from typing import Any, Awaitable, Callable
+
+from aiohttp import ClientConnectionError
+
+from utils.error.exception import RequestLimitExceeded, ServerIsTemporarilyUnavailable
+from utils.settings.config import EnvConfig
+from utils.settings.logger import LoggerFactory
+from . import deadline
+
+# Ошибки после которых GET можно безопасно повторить
+RETRYABLE_GET = (
+    ServerIsTemporarilyUnavailable,
+    RequestLimitExceeded,
+    ClientConnectionError,
+    asyncio.TimeoutError,
+)
+# POST повторяем только если WG отклонил запрос не выполнив его
+RETRYABLE_POST = (RequestLimitExceeded,)
+
+
+class RetryPolicy:
+    """Повтор с экспоненциальной задержкой и jitter.
+
+    jitter=0 даёт чистую экспоненту base_delay * 2**n,
+    jitter=1 — случайную задержку от 0 до неё ("full jitter").
+    """
+
+    def __init__(
+        self,
+        attempts: int = EnvConfig.RETRY_ATTEMPTS,
+        base_delay: float = EnvConfig.RETRY_BASE_DELAY,
+        max_delay: float = EnvConfig.RETRY_MAX_DELAY,
+        jitter: float = EnvConfig.RETRY_JITTER,
+    ):
+        self.attempts = max(1, attempts)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.jitter = min(1.0, max(0.0, jitter))
+
+    def delay(self, attempt: int) -> float:
+        delay = min(self.max_delay, self.base_delay * 2**attempt)
+        return delay * (1 - self.jitter * random.random())
+
+    async def run(
+        self,
+        func: Callable[[], Awaitable[Any]],
+        retry_on: tuple[type[BaseException], ...] = RETRYABLE_GET,
+    ) -> Any:
+        for attempt in range(self.attempts):
+            try:
+                return await func()
+            except retry_on as e:
+                if attempt + 1 >= self.attempts:
+                    raise
+                delay = self.delay(attempt)
+                left = deadline.remaining()
+                if left is not None and left <= delay:
+                    raise
+                LoggerFactory.log(
+                    f"Повтор запроса через {delay:.2f}с "
+                    f"(попытка {attempt + 2}/{self.attempts}): {e!r}",
+                    level="WARNING",
+                    channel="api",
+                )
+                await asyncio.sleep(delay)
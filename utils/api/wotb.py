@@ -1,19 +1,38 @@
-from aiohttp import ClientSession, ClientResponse
-from asynciolimiter import Limiter
+from aiohttp import ClientSession, ClientResponse, ClientTimeout
 from prometheus_client import Counter
 import asyncio
+import contextvars
 import time
+from urllib.parse import urlsplit, urlunsplit
 from utils.cache.redis_cache import RedisCache
 from utils.models.base_models import Singleton
+from utils.service.single_flight import SingleFlight, normalize_url
+from utils.service.resolver import CLAN_NAME, CLAN_TAG, PLAYER, EntityResolver
 from utils.models.player import UserDB, PlayerDetails
 from utils.models.clan import Clan, ClanDetails
 from utils.error.exception import *
-from utils.models.tank import PlayerModel
+from utils.models.tank import PlayerActivity, PlayerModel
+from utils.models.wg import TankStatsResponse, WGResponse, account_response
 from utils.settings.config import Config, EnvConfig
 from utils.error.exception import PlayerNotFound
+from .limiter import LimiterRegistry, Priority, set_priority
+from .rating import NO_RATING, RatingCache
+from .app_pool import AppIdPool
+from .retry import RETRYABLE_POST, RetryPolicy
+from .breaker import BreakerRegistry
+from . import deadline
+from .fields import ACCOUNT_MODELS, FieldProfile, account_fields, tank_fields
 
 from ..settings.logger import LoggerFactory
 
+try:
+    from orjson import loads
+except ImportError:  # orjson ставится вместе с fastapi[all]
+    from json import loads
+
+# WG API принимает до 100 account_id через запятую в одном запросе
+MAX_IDS_PER_REQUEST = 100
+
 
 def timer(func):
     async def wrapper(*args, **kwargs):
@@ -34,16 +53,24 @@ def timer(func):
     return wrapper
 
 
+def chunked(ids: list[int], size: int = MAX_IDS_PER_REQUEST) -> list[list[int]]:
+    return [ids[i : i + size] for i in range(0, len(ids), size)]
+
+
 class APIServer(Singleton):
 
     def __init__(self):
         if not hasattr(self, "initialized"):
             self._config = Config().get()
-            self.limiter = Limiter(EnvConfig.LIMIT)
+            self.limiter = LimiterRegistry()
+            self.app_ids = AppIdPool(self.limiter)
             self.session = None
             self._session = self.session
             self.exact = True
             self.redis_cache = RedisCache()
+            self.resolver = EntityResolver(self.redis_cache)
+            self.rating_cache = RatingCache(self.redis_cache)
+            self._rating_tasks: dict[tuple[str, int], asyncio.Task] = {}
             self.player_stats = {}
             self.player = {}
             self.initialized = True
@@ -51,12 +78,28 @@ class APIServer(Singleton):
                 "external_api_requests",
                 "Total requests to external APIs",
             )
+            self.single_flight = SingleFlight("api")
+            self.retry = RetryPolicy()
+            self.breakers = BreakerRegistry()
 
     async def init_session(self):
         if self.session is None:
-            self.session = ClientSession()
+            self.session = ClientSession(
+                timeout=ClientTimeout(total=EnvConfig.API_TIMEOUT)
+            )
             self._session = self.session
 
+    @staticmethod
+    def _target(url: str) -> str:
+        """Адрес запроса с учётом WG_API_BASE: хост переносится в путь."""
+        if not EnvConfig.WG_API_BASE:
+            return url
+        parts = urlsplit(url)
+        base = EnvConfig.WG_API_BASE.rstrip("/")
+        return urlunsplit(
+            urlsplit(f"{base}/{parts.netloc}{parts.path}")._replace(query=parts.query)
+        )
+
     def _get_url_by_reg(self, reg: str):
         match reg.lower():
             case "eu":
@@ -71,8 +114,7 @@ class APIServer(Singleton):
     def _get_id_by_reg(self, reg: str):
         reg = reg.lower()
         if reg in {"eu", "com", "asia", "na", "as"}:
-            tok = EnvConfig.WG_APP_IDS
-            return tok
+            return self.app_ids.choose(reg)
         raise TypeError()
 
     async def parse_status(self, response: ClientResponse):
@@ -84,35 +126,52 @@ class APIServer(Singleton):
                 raise Exception("Redirect")
             case status if 400 <= status < 500:
                 raise RequestError("Not found")
-            case 504:
+            case 502 | 503 | 504:
                 raise ServerIsTemporarilyUnavailable()
             case status if 500 <= status:
                 raise Exception("Server error")
             case _:
                 raise Exception(f"Unknown error status {status}")
 
+    @staticmethod
+    def raise_error(message: str, value=None):
+        match message:
+            case "INVALID_ACCESS_TOKEN":
+                raise InvalidAccessToken(value=value)
+            case "INVALID_IP_ADDRESS":
+                raise InvalidIpAddress(value=value)
+            case "REQUEST_LIMIT_EXCEEDED":
+                raise RequestLimitExceeded(value)
+            case "APPLICATION_IS_BLOCKED":
+                raise ApplicationIsBlocked(value)
+            case "SOURCE_NOT_AVAILABLE":
+                raise ServerIsTemporarilyUnavailable
+            case _:
+                raise RequestError(message=message, value=value)
+
     async def parse_response(
-        self, response: ClientResponse, count: bool = True, status_response: bool = True
-    ) -> dict:
-        data = await response.json()
+        self,
+        response: ClientResponse,
+        count: bool = True,
+        status_response: bool = True,
+        model: type[WGResponse] | None = None,
+    ) -> dict | WGResponse:
+        raw = await response.read()
+        if model is not None:
+            # байты ответа сразу в модели, без dict и повторной валидации
+            data = model.model_validate_json(raw)
+            if status_response and data.status != "ok":
+                self.raise_error(data.error.message, data.error.value)
+            if count and data.meta.count == 0:
+                raise PlayerNotFound(
+                    f"Игрок {response.url.query.get('search')} не найден"
+                )
+            return data
 
+        data = loads(raw)
         if status_response:
             if data["status"] != "ok":
-                message = data["error"]["message"]
-                value = data["error"].get("value")
-                match message:
-                    case "INVALID_ACCESS_TOKEN":
-                        raise InvalidAccessToken(value=value)
-                    case "INVALID_IP_ADDRESS":
-                        raise InvalidIpAddress(value=value)
-                    case "REQUEST_LIMIT_EXCEEDED":
-                        raise RequestLimitExceeded(value)
-                    case "APPLICATION_IS_BLOCKED":
-                        raise ApplicationIsBlocked(value)
-                    case "SOURCE_NOT_AVAILABLE":
-                        raise ServerIsTemporarilyUnavailable
-                    case _:
-                        raise RequestError(message=message, value=value)
+                self.raise_error(data["error"]["message"], data["error"].get("value"))
         if count:
             if data["meta"]["count"] == 0:
                 raise PlayerNotFound(
@@ -121,48 +180,111 @@ class APIServer(Singleton):
         return data
 
     @timer
-    async def fetch(self, url, parser=True):
-        await self.limiter.wait()
-        self.external_api_counter.inc()
-        LoggerFactory.log(
-            f"url={url}",
-            level="DEBUG",
-            channel="api",
+    async def fetch(self, url, parser=True, model: type[WGResponse] | None = None):
+        key = (normalize_url(url, exclude={"application_id"}), parser, model)
+        return await self.single_flight.do(
+            key, lambda: self.retry.run(lambda: self._fetch(url, parser, model))
         )
-        async with self.session.get(url) as response:
-            await self.parse_status(response)
-            if parser:
-                return await self.parse_response(response)
-            else:
-                return await response.json()
+
+    async def _fetch(self, url, parser=True, model=None):
+        # каждое приложение пула пробуем не больше одного раза
+        tries = max(1, len(self.app_ids.apps))
+        for attempt in range(tries):
+            try:
+                return await self._fetch_once(url, parser, model)
+            except (ApplicationIsBlocked, InvalidIpAddress) as e:
+                # выводим application_id из ротации и повторяем с другим
+                rotated = self.app_ids.rotate(url, reason=type(e).__name__)
+                if rotated is None or attempt == tries - 1:
+                    raise
+                url = rotated
+
+    async def _fetch_once(self, url, parser=True, model=None):
+        async def send(timeout: ClientTimeout):
+            async with self.session.get(self._target(url), timeout=timeout) as response:
+                await self.parse_status(response)
+                if parser:
+                    return await self.parse_response(response, model=model)
+                return loads(await response.read())
+
+        return await self._send(url, send)
 
     async def fetch_post(self, url, body):
-        await self.limiter.wait()
+        return await self.retry.run(
+            lambda: self._fetch_post(url, body), retry_on=RETRYABLE_POST
+        )
+
+    async def _fetch_post(self, url, body):
+        async def send(timeout: ClientTimeout):
+            async with self.session.post(
+                self._target(url), json=body, timeout=timeout
+            ) as response:
+                await self.parse_status(response)
+                data = loads(await response.read())
+            if data.get("error", {}).get("message") == "REQUEST_LIMIT_EXCEEDED":
+                raise RequestLimitExceeded(data["error"].get("value"))
+            return data
+
+        return await self._send(url, send, app_id=body.get("application_id"))
+
+    async def _send(self, url, send, app_id: str | None = None):
+        breaker = self.breakers.get(url)
+        breaker.check()
+        bucket = self.limiter.get(url, app_id)
+        try:
+            await asyncio.wait_for(bucket.wait(), deadline.check())
+        except (asyncio.TimeoutError, DeadlineExceeded):
+            breaker.release()
+            raise DeadlineExceeded(endpoint=breaker.name)
+        except BaseException:
+            # отмена во время ожидания не должна занимать пробный запрос
+            breaker.release()
+            raise
         self.external_api_counter.inc()
         LoggerFactory.log(
             f"url={url}",
             level="DEBUG",
             channel="api",
         )
-        async with self.session.post(url, json=body) as response:
-            await self.parse_status(response)
-            return await response.json()
+        try:
+            data = await send(
+                ClientTimeout(total=deadline.timeout(EnvConfig.API_TIMEOUT))
+            )
+        except RequestLimitExceeded:
+            self.limiter.backoff(url, app_id)
+            breaker.success()
+            raise
+        except ServerIsTemporarilyUnavailable:
+            self.limiter.backoff(url, app_id)
+            breaker.failure()
+            raise
+        except asyncio.TimeoutError:
+            breaker.failure()
+            left = deadline.remaining()
+            if left is not None and left <= 0:
+                raise DeadlineExceeded(endpoint=breaker.name)
+            raise
+        except BaseCustomException:
+            # сервис ответил, пусть и ошибкой запроса
+            breaker.success()
+            raise
+        except Exception:
+            breaker.failure()
+            raise
+        except BaseException:
+            breaker.release()
+            raise
+        bucket.success()
+        breaker.success()
+        return data
 
     async def get_user_id(self, user: UserDB) -> tuple[int, str]:
         player_id = user.player_id
         reg = user.region
         if not player_id:
-            name = user.name
-            player = await self.redis_cache.get(name)
-            if not player:
-                player_id = await self.get_id(reg, name)
-            else:
-                player = UserDB(
-                    player_id=player.get("player_id"),
-                    region=player.get("region"),
-                    name=player.get("name"),
-                )
-                player_id = player.player_id
+            player_id = await self.resolver.get(PLAYER, reg, user.name)
+            if player_id is None:
+                player_id = await self.get_id(reg, user.name)
         return player_id, reg
 
     async def get_id(self, region, nickname):
@@ -181,37 +303,102 @@ class APIServer(Singleton):
         )
         data = await self.fetch(url)
         player_id = int(data["data"][0]["account_id"])
-        user = UserDB(region=region, name=nickname, player_id=player_id)
-        await self.redis_cache.set(nickname, user.model_dump_json())
+        await self.resolver.set(PLAYER, region, data["data"][0]["nickname"], player_id)
         return player_id
 
-    async def get_general(self, user: UserDB) -> UserDB:
+    def _stats_url(
+        self,
+        region: str,
+        player_ids: str,
+        token: str | None = None,
+        fields: FieldProfile = FieldProfile.SESSION,
+    ) -> str:
+        url_template = self._config.game_api.urls.get_stats
+        return (
+            url_template.replace("<reg_url>", self._get_url_by_reg(region))
+            .replace("<app_id>", self._get_id_by_reg(region))
+            .replace("<player_id>", player_ids)
+            .replace("<fields>", account_fields(fields))
+            .replace("<access_token>", str(token if token else ""))
+        )
+
+    async def get_general(
+        self, user: UserDB, fields: FieldProfile = FieldProfile.SESSION
+    ) -> UserDB:
         player_id, reg = await self.get_user_id(user)
         token = user.access_token
 
-        url_template = self._config.game_api.urls.get_stats
-        url = (
-            url_template.replace("<reg_url>", self._get_url_by_reg(reg))
-            .replace("<app_id>", self._get_id_by_reg(reg))
-            .replace("<player_id>", str(player_id))
-            .replace("<access_token>", str(token if token else ""))
+        url = self._stats_url(reg, str(player_id), token, fields)
+        data = await self.fetch(url, model=account_response(ACCOUNT_MODELS[fields]))
+        general = data.data.get(str(player_id))
+        if not general:
+            raise NoUpdatePlayer(user=user)
+        # ник в запросе мог устареть: игрока переименовали
+        await self.resolver.rename(PLAYER, reg, user.name, general.nickname, player_id)
+        return UserDB(
+            region=reg,
+            player_id=player_id,
+            acount=general,
+            name=general.nickname,
+            access_token=token,
         )
-        data = await self.fetch(url)
-        if data and data["data"][str(player_id)]:
-            data = data["data"][str(player_id)]
-            general = PlayerModel(**data)
-            res = UserDB(
-                region=reg,
-                player_id=player_id,
-                acount=general,
-                name=data["nickname"],
-                access_token=token,
-            )
-            return res
-        else:
+
+    async def get_activity(self, user: UserDB) -> PlayerActivity:
+        """Дешёвая проверка: играл ли игрок (профиль change-check)."""
+        player_id, reg = await self.get_user_id(user)
+        url = self._stats_url(reg, str(player_id), fields=FieldProfile.CHANGE_CHECK)
+        data = await self.fetch(url, model=account_response(PlayerActivity))
+        activity = data.data.get(str(player_id))
+        if not activity:
             raise NoUpdatePlayer(user=user)
+        return activity
 
-    async def get_details_tank(self, user: UserDB, rating=True) -> UserDB:
+    async def get_general_many(
+        self,
+        region: str,
+        ids: list[int],
+        fields: FieldProfile = FieldProfile.SESSION,
+    ) -> dict[int, PlayerModel | PlayerActivity]:
+        urls = [
+            self._stats_url(region, ",".join(str(i) for i in chunk), fields=fields)
+            for chunk in chunked(list(dict.fromkeys(ids)))
+        ]
+        model = account_response(ACCOUNT_MODELS[fields])
+        responses = await asyncio.gather(
+            *[self.fetch(url, model=model) for url in urls]
+        )
+        return {
+            int(player_id): item
+            for data in responses
+            for player_id, item in data.data.items()
+            if item
+        }
+
+    async def get_medal_many(
+        self, region: str, ids: list[int]
+    ) -> dict[int, dict[str, int]]:
+        url_template = self._config.game_api.urls.get_achievements
+        urls = [
+            url_template.replace("<reg_url>", self._get_url_by_reg(region))
+            .replace("<app_id>", self._get_id_by_reg(region))
+            .replace("<player_id>", ",".join(str(i) for i in chunk))
+            for chunk in chunked(list(dict.fromkeys(ids)))
+        ]
+        responses = await asyncio.gather(*[self.fetch(url) for url in urls])
+        result = {}
+        for data in responses:
+            for player_id, item in data["data"].items():
+                if item:
+                    result[int(player_id)] = item["achievements"]
+        return result
+
+    async def get_details_tank(
+        self,
+        user: UserDB,
+        rating=True,
+        general: UserDB | None = None,
+        fields: FieldProfile = FieldProfile.SESSION,
+    ) -> UserDB:
         player_id, reg = await self.get_user_id(user)
         token = user.access_token
 
@@ -220,16 +407,22 @@ class APIServer(Singleton):
             url_template.replace("<reg_url>", self._get_url_by_reg(reg))
             .replace("<app_id>", self._get_id_by_reg(reg))
             .replace("<player_id>", str(player_id))
+            .replace("<fields>", tank_fields(fields))
             .replace("<access_token>", str(token if token else ""))
         )
 
         tasks = [
-            asyncio.create_task(self.fetch(url), name="fetch"),
-            asyncio.create_task(self.get_general(user), name="get_general"),
+            asyncio.create_task(self.fetch(url, model=TankStatsResponse), name="fetch")
         ]
+        if general is None:
+            tasks.append(
+                asyncio.create_task(
+                    self.get_general(user, fields=fields), name="get_general"
+                )
+            )
         if rating:
             tasks.append(asyncio.create_task(self.get_rating(user), name="get_rating"))
-        done, pending = await asyncio.wait(tasks, timeout=200)
+        done, pending = await asyncio.wait(tasks, timeout=deadline.check())
         results = {}
         for task in done:
             results[task.get_name()] = task.result()
@@ -238,12 +431,14 @@ class APIServer(Singleton):
             results[task.get_name()] = None
             task.cancel()
         data = results.get("fetch")
+        if data is None or (general is None and results.get("get_general") is None):
+            raise DeadlineExceeded(user=user.name)
 
-        if data["data"][str(player_id)] is None:
+        tanks = data.data.get(str(player_id))
+        if tanks is None:
             raise NoUpdatePlayer(user=user)
 
-        data["tanks"] = data["data"][str(player_id)]
-        gen = results.get("get_general")
+        gen = general or results.get("get_general")
         rat = results.get("get_rating")
         if rat:
             gen = gen.model_copy(
@@ -267,7 +462,8 @@ class APIServer(Singleton):
             player_id=player_id,
             name=gen.name,
             access_token=token,
-            acount=PlayerDetails(**data, **gen.acount.model_dump()),
+            # поля уже провалидированы, собираем модель без model_dump
+            acount=PlayerDetails.model_construct(**dict(gen.acount), tanks=tanks),
         )
         return res
 
@@ -283,6 +479,16 @@ class APIServer(Singleton):
         data = await self.fetch(url)
         return data["data"][str(player_id)]["achievements"]
 
+    async def get_encyclopedia(self) -> tuple[dict, dict]:
+        """Справочники техники и достижений: (vehicles, achievements)."""
+        app_id = self._get_id_by_reg("eu")
+        urls = self._config.game_api.urls
+        vehicles, achievements = await asyncio.gather(
+            self.fetch(urls.get_tankopedia_tank.replace("<app_id>", app_id)),
+            self.fetch(urls.get_tankopedia_achievements.replace("<app_id>", app_id)),
+        )
+        return vehicles["data"], achievements["data"]
+
     async def get_token(self, redirect_url, reg="eu") -> str:
         reg = self._get_url_by_reg(reg)
         url_template = self._config.game_api.urls.get_token
@@ -313,27 +519,99 @@ class APIServer(Singleton):
     async def logout(self, req, token):
         req = self._get_url_by_reg(req)
         url_template = self._config.game_api.urls.logout
-        url = url_template.replace("<reg_url>", req).replace(
-            "<app_id>", self._get_id_by_reg(req).replace("<token>", token)
+        url = (
+            url_template.replace("<reg_url>", req)
+            .replace("<app_id>", self._get_id_by_reg(req))
+            .replace("<token>", token)
         )
         data = await self.fetch(url, parser=False)
         return True
 
-    async def get_rating(self, user) -> set[int, int]:
+    async def get_rating(self, user) -> dict[str, int]:
+        """Место в рейтинге из кеша.
+
+        Устаревшее значение отдаётся сразу и обновляется в фоне. Если записи
+        нет, ждём фоновое обновление не дольше RATING_TIMEOUT.
+        """
         player_id, region = await self.get_user_id(user)
         reg = self._get_url_by_reg(region)
+        rating, fresh = await self.rating_cache.get(reg, player_id)
+        if fresh:
+            return rating
+        task = self._refresh_rating_background(reg, player_id)
+        if rating is not None:
+            return rating
+        try:
+            return dict(
+                await asyncio.wait_for(
+                    asyncio.shield(task), deadline.timeout(EnvConfig.RATING_TIMEOUT)
+                )
+            )
+        except Exception as e:
+            LoggerFactory.log(
+                f"Рейтинг игрока {player_id} не получен: {e!r}",
+                level="DEBUG",
+                channel="api",
+            )
+            return dict(NO_RATING)
+
+    async def refresh_rating(self, reg: str, player_id: int) -> dict[str, int]:
         url_template = self._config.game_api.urls.get_position_rating
         url = url_template.replace("<reg_url>", reg).replace(
             "<player_id>", str(player_id)
         )
-        try:
-            data = await self.fetch(url, parser=False)
-            score = data["neighbors"][0]["score"]
-            number = data["neighbors"][0]["number"]
-        except Exception as e:
-            score = 0
-            number = 0
-        return {"score": score, "number": number}
+        data = await self.fetch(url, parser=False)
+        neighbors = data.get("neighbors")
+        if neighbors:
+            rating = {
+                "score": neighbors[0]["score"],
+                "number": neighbors[0]["number"],
+            }
+        else:
+            # игрока нет в лидерборде, это тоже кешируем
+            rating = dict(NO_RATING)
+        await self.rating_cache.set(reg, player_id, rating)
+        return rating
+
+    async def refresh_ratings(self, region: str, ids: list[int]):
+        """Обновление мест пачки игроков, для ночной задачи."""
+        reg = self._get_url_by_reg(region)
+        results = await asyncio.gather(
+            *[self.refresh_rating(reg, player_id) for player_id in ids],
+            return_exceptions=True,
+        )
+        failed = sum(isinstance(result, Exception) for result in results)
+        if failed:
+            LoggerFactory.log(
+                f"Не обновлено мест в рейтинге: {failed} из {len(ids)}",
+                level="WARNING",
+                channel="api",
+            )
+
+    def _refresh_rating_background(self, reg: str, player_id: int) -> asyncio.Task:
+        key = (reg, player_id)
+        task = self._rating_tasks.get(key)
+        if task is not None:
+            return task
+
+        async def refresh():
+            set_priority(Priority.BULK, flow="rating")
+            return await self.refresh_rating(reg, player_id)
+
+        def done(task: asyncio.Task):
+            self._rating_tasks.pop(key, None)
+            if not task.cancelled() and task.exception():
+                LoggerFactory.log(
+                    f"Фоновое обновление рейтинга {player_id}: {task.exception()!r}",
+                    level="DEBUG",
+                    channel="api",
+                )
+
+        # пустой контекст: без срока и приоритета запроса, который его запустил
+        task = asyncio.create_task(refresh(), context=contextvars.Context())
+        task.add_done_callback(done)
+        self._rating_tasks[key] = task
+        return task
 
     async def get_clan_info(self, name, region) -> Clan:
         reg = self._get_url_by_reg(region)
@@ -362,15 +640,39 @@ class APIServer(Singleton):
         url = url_template.replace("<reg_url>", reg).replace(
             "<app_id>", self._get_id_by_reg(reg)
         )
-        if not clan_id:
-            clan = await self.get_clan_info(name, region)
-            clan_id = clan.clan_id
-            url = url.replace("<clan_id>", str(clan_id))
-
-        else:
-            url = url.replace("<clan_id>", str(clan_id))
-        data = await self.fetch(url)
-        return ClanDetails(**data["data"][str(clan_id)])
+        if clan_id:
+            data = await self.fetch(url.replace("<clan_id>", str(clan_id)))
+            details = ClanDetails(**data["data"][str(clan_id)])
+            await self._remember_clan(region, details)
+            return details
+
+        clan_id = await self.resolver.get(
+            CLAN_NAME, region, name
+        ) or await self.resolver.get(CLAN_TAG, region, name)
+        if clan_id:
+            data = await self.fetch(url.replace("<clan_id>", str(clan_id)))
+            item = data["data"].get(str(clan_id))
+            if item and name.lower() in (item["name"].lower(), item["tag"].lower()):
+                details = ClanDetails(**item)
+                await self._remember_clan(region, details)
+                return details
+            # клан переименован или распущен, ключ больше не его
+            await self.resolver.forget(CLAN_NAME, region, name)
+            await self.resolver.forget(CLAN_TAG, region, name)
+
+        clan = await self.get_clan_info(name, region)
+        data = await self.fetch(url.replace("<clan_id>", str(clan.clan_id)))
+        details = ClanDetails(**data["data"][str(clan.clan_id)])
+        await self._remember_clan(region, details)
+        return details
+
+    async def _remember_clan(self, region, details: ClanDetails):
+        await self.resolver.rename(
+            CLAN_NAME, region, details.old_name, details.name, details.clan_id
+        )
+        await self.resolver.rename(
+            CLAN_TAG, region, details.old_tag, details.tag, details.clan_id
+        )
 
     async def close(self):
         if self.session:
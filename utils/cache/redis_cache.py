@@ -1,4 +1,3 @@
-from pydantic import BaseModel
 from redis import asyncio as aioredis
 import json
 import hashlib
@@ -31,26 +30,52 @@ class RedisCache:
         await self.connect()
         await self.redis.set(key, value, ex=expire)
 
+    async def delete(self, *keys: str):
+        await self.connect()
+        await self.redis.delete(*keys)
+
     def make_key(self, namespace: str, **params) -> str:
         raw = json.dumps(params, sort_keys=True)
         hash_key = hashlib.md5(raw.encode()).hexdigest()
         return f"{namespace}:{hash_key}"
 
+    async def get_stale(self, namespace: str, **params) -> Any:
+        """Последний результат cache_or_compute, даже если он уже устарел."""
+        return await self.get(f"{self.make_key(namespace, **params)}:stale")
+
+    async def set_stale(self, namespace: str, model: Any, expire: int, **params):
+        """Запасная копия для get_stale без обычного кеша."""
+        key = f"{self.make_key(namespace, **params)}:stale"
+        await self.set(key, self.dump(model), expire)
+
+    @staticmethod
+    def dump(model: Any) -> str:
+        if isinstance(model, list):
+            return json.dumps([i.model_dump() for i in model])
+        return model.model_dump_json()
+
     async def cache_or_compute(
-        self, namespace: str, expire: int, compute_func: Callable, **params
+        self,
+        namespace: str,
+        expire: int,
+        compute_func: Callable,
+        stale_expire: int | None = None,
+        admit: Callable | None = None,
+        **params,
     ) -> Any:
         key = self.make_key(namespace, **params)
         cached = await self.get(key)
         if cached:
             logger.bind(name="root").info(f"Взято из кеша функция {key}")
             return cached
+        # только при промахе: admit может вернуть готовый ответ вместо вычисления
+        if admit is not None and (ready := await admit()):
+            return ready
         model = await compute_func()
-        if isinstance(model, list):
-            result = [i.model_dump() for i in model]
-            result = json.dumps(result)
-        if isinstance(model, BaseModel):
-            result = model.model_dump_json()
+        result = self.dump(model)
         await self.set(key, result, expire)
+        if stale_expire:
+            await self.set(f"{key}:stale", result, stale_expire)
         return model
 
 
@@ -1,28 +1,227 @@
+import asyncio
+import hashlib
+import json
+import re
+from datetime import datetime, timedelta, timezone
 from typing import AsyncGenerator
 from bson import ObjectId, errors
-from pymongo import AsyncMongoClient
+from pymongo import (
+    ASCENDING,
+    DESCENDING,
+    AsyncMongoClient,
+    IndexModel,
+    InsertOne,
+    ReplaceOne,
+    UpdateOne,
+)
+from pymongo.errors import PyMongoError
 from pymongo.asynchronous.database import AsyncDatabase
 from pymongo.asynchronous.collection import AsyncCollection
-from pymongo.asynchronous.cursor import AsyncCursor
 
 from utils.error.exception import NotFoundPeriod, NotFoundSessionId
 
 from .helper import get_clan_rating_pipeline
+from .monitoring import command_monitor
 from utils.settings.logger import LoggerFactory
-from ..models.player import UserDB, Tank
-from ..models.clan import ClanDB
+from ..models.player import PlayerRef, UserDB, Tank
+from ..models.clan import ClanDB, ClanRef
 from utils.settings.config import EnvConfig
 from loguru import logger
 
+# по сколько ссылок на игроков/кланов отдаёт find_refs
+REFS_BATCH = 1000
+
 
 class Connect:
-    client = AsyncMongoClient(EnvConfig.MONGO)
+    client = AsyncMongoClient(EnvConfig.MONGO, event_listeners=[command_monitor])
     db: AsyncDatabase = client[EnvConfig.NAME_DB]
+    # Индексы под запросы репозитория, создаются в ensure_indexes
+    indexes: list[IndexModel] = []
+    # Документы хранят last_access, который обновляется при чтении
+    track_access = False
 
     @classmethod
     async def add(cls, data):
         pass
 
+    @classmethod
+    async def ensure_indexes(cls):
+        """Создаёт индексы из `indexes`, уже существующие пропускаются."""
+        if not cls.indexes:
+            return
+        try:
+            names = await cls.collection.create_indexes(cls.indexes)
+            if cls.track_access:
+                # документы старше поля last_access отсчитывают срок с запуска
+                await cls.collection.update_many(
+                    {"last_access": {"$exists": False}},
+                    {"$set": {"last_access": cls.utcnow()}},
+                )
+        except PyMongoError as e:
+            LoggerFactory.log(
+                f"Индексы {cls.collection.name} не созданы: {e}", level="ERROR"
+            )
+            return
+        LoggerFactory.log(
+            f"Индексы {cls.collection.name}: {', '.join(names)}", level="DEBUG"
+        )
+
+    @classmethod
+    async def index_stats(cls) -> list[dict]:
+        """Использование индексов коллекции по $indexStats."""
+        cursor = await cls.collection.aggregate(
+            [{"$indexStats": {}}, {"$sort": {"name": 1}}]
+        )
+        return [
+            {
+                "name": item["name"],
+                "key": dict(item["key"]),
+                "ops": item["accesses"]["ops"],
+                "since": item["accesses"]["since"],
+            }
+            async for item in cursor
+        ]
+
+    @staticmethod
+    def utcnow() -> datetime:
+        return datetime.now(timezone.utc)
+
+    @classmethod
+    async def touch(cls, doc: dict, **fields):
+        """Обновляет last_access прочитанного документа.
+
+        Пишет не чаще раза в ACCESS_TOUCH_INTERVAL, если только поля fields
+        не отличаются от сохранённых.
+        """
+        now = cls.utcnow()
+        last = doc.get("last_access")
+        if (
+            last is not None
+            and now - last.replace(tzinfo=timezone.utc)
+            < timedelta(seconds=EnvConfig.ACCESS_TOUCH_INTERVAL)
+            and all(doc.get(key, value) == value for key, value in fields.items())
+        ):
+            return
+        await cls.collection.update_one(
+            {"_id": doc["_id"]}, {"$set": {"last_access": now, **fields}}
+        )
+
+    @staticmethod
+    def lower(value: str | None) -> str | None:
+        """Нормализованное значение для точного поиска без учёта регистра."""
+        return value.lower() if value else None
+
+    @classmethod
+    async def partitions(cls, count: int) -> list[dict]:
+        """Делит коллекцию на count диапазонов _id по времени создания."""
+        first = await cls.collection.find_one(projection={"_id": 1}, sort=[("_id", 1)])
+        last = await cls.collection.find_one(projection={"_id": 1}, sort=[("_id", -1)])
+        if count <= 1 or first is None or first["_id"] == last["_id"]:
+            return [{}]
+        start = first["_id"].generation_time.timestamp()
+        step = (last["_id"].generation_time.timestamp() + 1 - start) / count
+        bounds = [
+            ObjectId.from_datetime(
+                datetime.fromtimestamp(start + step * i, tz=timezone.utc)
+            )
+            for i in range(1, count)
+        ]
+        edges = [None, *bounds, None]
+        filters = []
+        for low, high in zip(edges, edges[1:]):
+            condition = {}
+            if low is not None:
+                condition["$gte"] = low
+            if high is not None:
+                condition["$lt"] = high
+            filters.append({"_id": condition})
+        return filters
+
+    @classmethod
+    async def read_all(
+        cls,
+        projection: dict,
+        partitions: int = 1,
+        filter: dict | None = None,
+    ) -> list[dict]:
+        """Читает небольшую проекцию коллекции целиком, диапазоны _id
+        параллельно. Курсоры закрываются до начала обработки, так что
+        долгая обработка не упирается в таймаут курсора."""
+        parts = await asyncio.gather(
+            *(
+                cls.collection.find(
+                    {**(filter or {}), **partition}, projection=projection
+                ).to_list(length=None)
+                for partition in await cls.partitions(partitions)
+            )
+        )
+        return [doc for part in parts for doc in part]
+
+    @staticmethod
+    def content_hash(doc: dict) -> str:
+        return hashlib.sha1(
+            json.dumps(doc, sort_keys=True, ensure_ascii=False, default=str).encode()
+        ).hexdigest()
+
+    @classmethod
+    async def sync_by_hash(cls, key: str, docs: list[dict]) -> int:
+        """Записывает одним bulk_write только документы, чей хеш
+        отличается от сохранённого. Возвращает число записанных.
+
+        Документы, добавленные через админку (admin), не трогаются.
+        Для сохранённых без хеша он считается по их содержимому.
+        """
+        stored, admin = {}, set()
+        async for doc in cls.collection.find({}, projection={"_id": 0}):
+            if doc.pop("admin", False):
+                admin.add(doc[key])
+            else:
+                stored[doc[key]] = doc.pop("hash", None) or cls.content_hash(doc)
+        requests = []
+        for doc in docs:
+            digest = cls.content_hash(doc)
+            if doc[key] in admin or stored.get(doc[key]) == digest:
+                continue
+            requests.append(
+                ReplaceOne({key: doc[key]}, {**doc, "hash": digest}, upsert=True)
+            )
+        if requests:
+            await cls.collection.bulk_write(requests, ordered=False)
+        return len(requests)
+
+    @classmethod
+    def changed_fields(
+        cls,
+        old: dict,
+        new: dict,
+        depth: int = 2,
+        prefix: str = "",
+        whole: frozenset[str] = frozenset(),
+    ) -> dict:
+        """Поля new, отличающиеся от old, в виде путей для $set.
+
+        Вложенные документы сравниваются до глубины depth, глубже,
+        списки и поля из whole заменяются целиком.
+        """
+        changes = {}
+        for key, value in new.items():
+            current = old.get(key)
+            if value == current:
+                continue
+            path = f"{prefix}{key}"
+            if (
+                depth > 1
+                and key not in whole
+                and isinstance(value, dict)
+                and isinstance(current, dict)
+            ):
+                changes.update(
+                    cls.changed_fields(current, value, depth - 1, f"{path}.")
+                )
+            else:
+                changes[path] = value
+        return changes
+
     @classmethod
     def safe_object_id(cls, session_id: str) -> ObjectId:
         try:
@@ -33,72 +232,144 @@ class Connect:
 
 class Player_sessions(Connect):
     collection: AsyncCollection = Connect.db["Session"]
+    indexes = [
+        IndexModel([("player_id", ASCENDING), ("region", ASCENDING)]),
+        IndexModel([("region", ASCENDING), ("name_lower", ASCENDING)]),
+        IndexModel(
+            [("access_token", ASCENDING)],
+            partialFilterExpression={"access_token": {"$type": "string"}},
+        ),
+        # archive_dormant
+        IndexModel([("last_access", ASCENDING)]),
+    ]
+    track_access = True
+    # Игроки, чьи снимки обновляют фоновые задачи
+    active_filter = {"archived": {"$ne": True}}
 
     @classmethod
     async def get(cls, name, id, region, access_token) -> UserDB:
         if name is None and id is None:
             filter = {"access_token": access_token}
         else:
-            filter = {
-                "$or": [
-                    {"player_id": id, "region": region},
-                    {
-                        "name": {"$regex": f"^{name}$", "$options": "i"},
-                        "region": region,
-                    },
-                ]
-            }
+            conditions = [{"player_id": id, "region": region}]
+            if name:
+                conditions.append({"name_lower": cls.lower(name), "region": region})
+            filter = {"$or": conditions}
         res = await cls.collection.find_one(
             filter=filter,
         )
         if res:
+            # вернувшийся игрок снова попадает в ночное обновление
+            await cls.touch(res, archived=False)
             res = UserDB.model_validate(res)
         return res
 
     @classmethod
-    async def add(cls, user: UserDB) -> UserDB:
+    def document(cls, user: UserDB) -> dict:
+        return {**user.model_dump(), "name_lower": cls.lower(user.name)}
 
-        await cls.collection.replace_one(
-            filter={"player_id": user.player_id},
-            replacement=user.model_dump(),
+    @classmethod
+    async def add(cls, user: UserDB, previous: UserDB | None = None) -> UserDB:
+        """Сохраняет снимок игрока.
+
+        Если известен сохранённый ранее снимок previous, пишутся только
+        изменившиеся поддокументы. Если снимок в базе с тех пор сменился,
+        он перезаписывается целиком, чтобы не смешать два снимка.
+        """
+        if previous is not None:
+            # medal целиком: в базе он может быть ещё в старом формате списком
+            changes = cls.changed_fields(
+                cls.document(previous), cls.document(user), whole=frozenset({"medal"})
+            )
+            if not changes:
+                return user
+            result = await cls.collection.update_one(
+                {"player_id": user.player_id, "timestamp": previous.timestamp},
+                {"$set": changes},
+            )
+            if result.matched_count:
+                return user
+        # $set, а не замена: last_access и archived остаются
+        await cls.collection.update_one(
+            {"player_id": user.player_id},
+            {"$set": cls.document(user)},
             upsert=True,
         )
         return user
 
+    @classmethod
+    def add_op(cls, user: UserDB) -> UpdateOne:
+        """Операция `add` для BulkWriter."""
+        return UpdateOne(
+            {"player_id": user.player_id}, {"$set": cls.document(user)}, upsert=True
+        )
+
+    @classmethod
+    def update_token_op(cls, user: UserDB) -> UpdateOne:
+        return UpdateOne(
+            {"player_id": user.player_id},
+            {"$set": {"access_token": user.access_token}},
+        )
+
     @classmethod
     async def update(cls, user: UserDB) -> UserDB:
-        existing_document = await cls.collection.find_one({"player_id": user.player_id})
-        if existing_document:
-            await cls.collection.update_one(
-                {"player_id": user.player_id},
-                {"$set": {"access_token": user.access_token}},
-            )
-        else:
-            await cls.add(user)
+        """Обновляет токен и ник, новый игрок сохраняется целиком."""
+        update = {
+            "access_token": user.access_token,
+            "last_access": cls.utcnow(),
+            "archived": False,
+        }
+        if user.name:
+            update.update(name=user.name, name_lower=cls.lower(user.name))
+        # остальные поля снимка пишутся только при вставке
+        on_insert = {
+            key: value
+            for key, value in cls.document(user).items()
+            if key not in update and key != "player_id"
+        }
+        await cls.collection.update_one(
+            {"player_id": user.player_id},
+            {"$set": update, "$setOnInsert": on_insert},
+            upsert=True,
+        )
         return user
 
+    @classmethod
+    async def archive_dormant(cls, days: int = EnvConfig.PLAYER_ARCHIVE_DAYS) -> int:
+        """Исключает из фоновых обновлений игроков, не заходивших days дней."""
+        cutoff = cls.utcnow() - timedelta(days=days)
+        result = await cls.collection.update_many(
+            {"last_access": {"$lt": cutoff}, **cls.active_filter},
+            {"$set": {"archived": True}},
+        )
+        return result.modified_count
+
     @classmethod
     async def gets(cls, user: UserDB) -> list[UserDB]:
         res = await cls.collection.find(
-            filter={"name": {"$regex": user.name, "$options": "i"}},
+            filter={"name": {"$regex": re.escape(user.name), "$options": "i"}},
             projection={"name": 1, "_id": 0, "region": 1, "player_id": 1},
         ).to_list(length=10)
         return [UserDB.model_validate(doc) for doc in res]
 
     @classmethod
-    async def find_all(cls) -> AsyncGenerator[list[UserDB], None]:
-        batch_size = 100
-        cursor: AsyncCursor = cls.collection.find(batch_size=batch_size)
-
-        while True:
-            batch = await cursor.to_list(length=batch_size)
-            if not batch:
-                break
-            yield [UserDB.model_validate(doc) for doc in batch]
+    async def find_refs(
+        cls, partitions: int = EnvConfig.SCAN_PARTITIONS
+    ) -> AsyncGenerator[list[PlayerRef], None]:
+        """Ссылки PlayerRef на всех неархивных игроков пачками."""
+        projection = {"_id": 0, **dict.fromkeys(PlayerRef.model_fields, 1)}
+        docs = await cls.read_all(projection, partitions, filter=cls.active_filter)
+        for i in range(0, len(docs), REFS_BATCH):
+            yield [PlayerRef.model_validate(doc) for doc in docs[i : i + REFS_BATCH]]
 
 
 class Clan_sessions(Connect):
     collection: AsyncCollection = Connect.db["Clan"]
+    indexes = [
+        IndexModel([("clan_id", ASCENDING)]),
+        IndexModel([("region", ASCENDING), ("name_lower", ASCENDING)]),
+        IndexModel([("region", ASCENDING), ("tag_lower", ASCENDING)]),
+    ]
 
     @classmethod
     async def get(cls, name: str, clan_id, region) -> ClanDB:
@@ -108,15 +379,8 @@ class Clan_sessions(Connect):
             filter_conditions.append({"clan_id": clan_id, "region": region})
 
         if name:
-            filter_conditions.append(
-                {"name": {"$regex": f"^{name}$", "$options": "i"}, "region": region}
-            )
-            filter_conditions.append(
-                {
-                    "tag": {"$regex": f"^{name.upper()}$", "$options": "i"},
-                    "region": region,
-                }
-            )
+            filter_conditions.append({"name_lower": cls.lower(name), "region": region})
+            filter_conditions.append({"tag_lower": cls.lower(name), "region": region})
 
         # Объединяем условия с оператором "$or"
         filter = {"$or": filter_conditions}
@@ -124,21 +388,34 @@ class Clan_sessions(Connect):
         if res:
             return ClanDB(**res)
 
+    @classmethod
+    def document(cls, clan: ClanDB) -> dict:
+        return {
+            **clan.model_dump(),
+            "name_lower": cls.lower(clan.name),
+            "tag_lower": cls.lower(clan.tag),
+        }
+
     @classmethod
     async def add(cls, clan: ClanDB) -> ClanDB:
         await cls.collection.replace_one(
             filter={"clan_id": clan.clan_id},
-            replacement=clan.model_dump(),
+            replacement=cls.document(clan),
             upsert=True,
         )
         return clan
 
+    @classmethod
+    def add_op(cls, clan: ClanDB) -> ReplaceOne:
+        """Операция `add` для BulkWriter."""
+        return ReplaceOne({"clan_id": clan.clan_id}, cls.document(clan), upsert=True)
+
     @classmethod
     async def gets(cls, name) -> list[ClanDB]:
         filter = {
             "$or": [
-                {"name": {"$regex": name, "$options": "i"}},
-                {"tag": {"$regex": name, "$options": "i"}},
+                {"name": {"$regex": re.escape(name), "$options": "i"}},
+                {"tag": {"$regex": re.escape(name), "$options": "i"}},
             ]
         }
         res = await cls.collection.find(
@@ -147,24 +424,35 @@ class Clan_sessions(Connect):
         return [ClanDB.model_validate(doc) for doc in res]
 
     @classmethod
-    async def find_all(cls) -> AsyncGenerator[list, None]:
-        batch_size = 100
-        cursor: AsyncCursor = cls.collection.find(batch_size=batch_size)
-        while True:
-            batch = await cursor.to_list(length=batch_size)
-            if not batch:
-                break
-            yield [ClanDB.model_validate(doc) for doc in batch]
+    async def find_refs(
+        cls, partitions: int = EnvConfig.SCAN_PARTITIONS
+    ) -> AsyncGenerator[list[ClanRef], None]:
+        """Ссылки ClanRef на все кланы пачками."""
+        projection = {"_id": 0, **dict.fromkeys(ClanRef.model_fields, 1)}
+        docs = await cls.read_all(projection, partitions)
+        for i in range(0, len(docs), REFS_BATCH):
+            yield [ClanRef.model_validate(doc) for doc in docs[i : i + REFS_BATCH]]
 
 
 class Player_all_sessions(Player_sessions):
     collection: AsyncCollection = Connect.db["Session_all"]
+    track_access = False
+    indexes = [
+        # get, get_period_sessions: игрок + диапазон/сортировка по времени
+        IndexModel([("player_id", ASCENDING), ("timestamp", DESCENDING)]),
+        # Player_daily.rollup: $match по timestamp
+        IndexModel([("timestamp", ASCENDING)]),
+    ]
 
     @classmethod
     async def add(cls, user: list[UserDB]) -> UserDB:
         users = [i.model_dump() for i in user]
         await cls.collection.insert_many(users)
 
+    @classmethod
+    def add_op(cls, user: UserDB) -> InsertOne:
+        return InsertOne(user.model_dump())
+
     @classmethod
     async def get(cls, user: UserDB, timestamp_ago: int) -> UserDB:
         filter = {
@@ -177,6 +465,151 @@ class Player_all_sessions(Player_sessions):
         if res:
             return UserDB.model_validate(res)
 
+    @classmethod
+    async def get_period_sessions(cls, player_id, start_day, end_day) -> list[UserDB]:
+        filter = {
+            "$and": [
+                {"player_id": player_id},
+                {"timestamp": {"$gte": start_day, "$lte": end_day}},
+            ]
+        }
+        res = await cls.collection.find(filter=filter).to_list(length=None)
+        return [UserDB.model_validate(doc) for doc in res]
+
+
+class Player_daily(Connect):
+    """Дневные итоги игрока по снимкам Session_all: накопленные значения
+    последнего снимка за сутки (UTC) и прирост относительно прошлых итогов.
+    """
+
+    collection: AsyncCollection = Connect.db["Session_daily"]
+    indexes = [
+        IndexModel([("player_id", ASCENDING), ("day", ASCENDING)], unique=True),
+        # get_top: $match по timestamp
+        IndexModel([("timestamp", ASCENDING)]),
+    ]
+    # поле итогов: путь в снимке игрока
+    FIELDS = {
+        "battles": "acount.statistics.all.battles",
+        "wins": "acount.statistics.all.wins",
+        "damage_dealt": "acount.statistics.all.damage_dealt",
+        "xp": "acount.statistics.all.xp",
+        "hits": "acount.statistics.all.hits",
+        "shots": "acount.statistics.all.shots",
+        "survived_battles": "acount.statistics.all.survived_battles",
+    }
+    DAY = 86400
+
+    @classmethod
+    def day_of(cls, timestamp: int) -> int:
+        return timestamp - timestamp % cls.DAY
+
+    @classmethod
+    def snapshot_stats(cls, doc: dict) -> dict[str, int]:
+        stats = {}
+        for field, path in cls.FIELDS.items():
+            value = doc
+            for key in path.split("."):
+                value = (value or {}).get(key)
+            stats[field] = value or 0
+        return stats
+
+    @classmethod
+    def rollup_op(cls, snapshot: dict, previous: dict | None) -> UpdateOne:
+        stats = cls.snapshot_stats(snapshot)
+        delta = {
+            field: value - (previous or {}).get(field, value)
+            for field, value in stats.items()
+        }
+        day = cls.day_of(snapshot["timestamp"])
+        return UpdateOne(
+            {"player_id": snapshot["player_id"], "day": day},
+            {
+                "$set": {
+                    "region": snapshot.get("region"),
+                    "name": snapshot.get("name"),
+                    "timestamp": snapshot["timestamp"],
+                    "stats": stats,
+                    "delta": delta,
+                }
+            },
+            upsert=True,
+        )
+
+    @classmethod
+    def snapshot_projection(cls) -> dict:
+        return {
+            "_id": 0,
+            "player_id": 1,
+            "region": 1,
+            "name": 1,
+            "timestamp": 1,
+            **dict.fromkeys(cls.FIELDS.values(), 1),
+        }
+
+    @classmethod
+    async def previous_stats(cls, ids: list[int], day: int) -> dict[int, dict]:
+        """Последние итоги до day для каждого игрока из ids."""
+        cursor = await cls.collection.aggregate(
+            [
+                {"$match": {"player_id": {"$in": ids}, "day": {"$lt": day}}},
+                {"$sort": {"player_id": 1, "day": -1}},
+                {"$group": {"_id": "$player_id", "stats": {"$first": "$stats"}}},
+            ]
+        )
+        return {doc["_id"]: doc["stats"] async for doc in cursor}
+
+    @classmethod
+    async def rollup(cls, writer, day: int, chunk: int = 1000) -> int:
+        """Итоги за сутки day по последнему снимку каждого игрока."""
+        cursor = await Player_all_sessions.collection.aggregate(
+            [
+                {"$match": {"timestamp": {"$gte": day, "$lt": day + cls.DAY}}},
+                {"$sort": {"timestamp": 1}},
+                {"$project": cls.snapshot_projection()},
+                {"$group": {"_id": "$player_id", "doc": {"$last": "$$ROOT"}}},
+            ]
+        )
+        count = 0
+        snapshots = []
+        async for item in cursor:
+            snapshots.append(item["doc"])
+            if len(snapshots) >= chunk:
+                count += await cls._write_rollups(writer, snapshots, day)
+                snapshots = []
+        if snapshots:
+            count += await cls._write_rollups(writer, snapshots, day)
+        return count
+
+    @classmethod
+    async def _write_rollups(cls, writer, snapshots: list[dict], day: int) -> int:
+        previous = await cls.previous_stats(
+            [doc["player_id"] for doc in snapshots], day
+        )
+        await writer.add(
+            cls.collection,
+            *[cls.rollup_op(doc, previous.get(doc["player_id"])) for doc in snapshots],
+        )
+        return len(snapshots)
+
+    @classmethod
+    async def backfill_player(cls, writer, player_id: int) -> int:
+        """Итоги за все дни истории игрока из Session_all."""
+        cursor = Player_all_sessions.collection.find(
+            {"player_id": player_id},
+            projection=cls.snapshot_projection(),
+            sort=[("timestamp", ASCENDING)],
+        )
+        # последний снимок каждых суток
+        days: dict[int, dict] = {}
+        async for doc in cursor:
+            days[cls.day_of(doc["timestamp"])] = doc
+        previous = None
+        for day in sorted(days):
+            await writer.add(cls.collection, cls.rollup_op(days[day], previous))
+            previous = cls.snapshot_stats(days[day])
+        return len(days)
+
     @classmethod
     async def get_top(cls, parameter, start_day, limit=10):
         base_match = {"$match": {"timestamp": {"$gte": start_day}}}
@@ -187,12 +620,12 @@ class Player_all_sessions(Player_sessions):
                 "_id": "$player_id",
                 "name": {"$last": "$name"},
                 "region": {"$last": "$region"},
-                "lastBattle": {"$last": "$acount.statistics.all.battles"},
-                "firstBattle": {"$first": "$acount.statistics.all.battles"},
-                "lastWins": {"$last": "$acount.statistics.all.wins"},
-                "firstWins": {"$first": "$acount.statistics.all.wins"},
-                "lastDamage": {"$last": "$acount.statistics.all.damage_dealt"},
-                "firstDamage": {"$first": "$acount.statistics.all.damage_dealt"},
+                "lastBattle": {"$last": "$stats.battles"},
+                "firstBattle": {"$first": "$stats.battles"},
+                "lastWins": {"$last": "$stats.wins"},
+                "firstWins": {"$first": "$stats.wins"},
+                "lastDamage": {"$last": "$stats.damage_dealt"},
+                "firstDamage": {"$first": "$stats.damage_dealt"},
             }
         }
 
@@ -257,19 +690,25 @@ class Player_all_sessions(Player_sessions):
         return res
 
     @classmethod
-    async def get_period_sessions(cls, player_id, start_day, end_day) -> list[UserDB]:
-        filter = {
-            "$and": [
-                {"player_id": player_id},
-                {"timestamp": {"$gte": start_day, "$lte": end_day}},
-            ]
-        }
-        res = await cls.collection.find(filter=filter).to_list(length=None)
-        return [UserDB.model_validate(doc) for doc in res]
+    async def get_period(
+        cls, player_id: int, start_day: int, end_day: int
+    ) -> list[dict]:
+        return await cls.collection.find(
+            {
+                "player_id": player_id,
+                "day": {"$gte": cls.day_of(start_day), "$lte": end_day},
+            },
+            projection={"_id": 0, "day": 1, "timestamp": 1, "delta": 1},
+            sort=[("day", ASCENDING)],
+        ).to_list(length=None)
 
 
 class Clan_all_sessions(Clan_sessions):
     collection: AsyncCollection = Connect.db["Clan_all"]
+    indexes = [
+        IndexModel([("clan_id", ASCENDING), ("timestamp", DESCENDING)]),
+        IndexModel([("timestamp", ASCENDING)]),
+    ]
 
     @classmethod
     async def get(cls, clan: ClanDB, timestamp_ago: int) -> ClanDB:
@@ -288,6 +727,10 @@ class Clan_all_sessions(Clan_sessions):
         await cls.collection.insert_one(clan.model_dump())
         return clan
 
+    @classmethod
+    def add_op(cls, clan: ClanDB) -> InsertOne:
+        return InsertOne(clan.model_dump())
+
     @classmethod
     async def get_top(cls, end_day, start_day, limit=10):
         pipeline = get_clan_rating_pipeline(start_day, end_day)
@@ -297,6 +740,7 @@ class Clan_all_sessions(Clan_sessions):
 
 class Tank_DB(Connect):
     collection: AsyncCollection = Connect.db["Tank"]
+    indexes = [IndexModel([("tank_id", ASCENDING)], unique=True)]
 
     @classmethod
     async def get_by_id(cls, id: int | Tank) -> dict:
@@ -311,32 +755,23 @@ class Tank_DB(Connect):
             LoggerFactory.log(f"Танк не найден с параметрами id={id}", level="DEBUG")
         return res
 
-    @classmethod
-    async def get_list_id(cls, id: list[int]):
-        res = await cls.collection.find({"tank_id": {"$in": id}}).to_list(length=None)
-
-        # Преобразование полученных данных в словарь
-        for item in res:
-            item["level"] = item.pop("tier")
-        data = {item["tank_id"]: item for item in res}
-        # Для каждого ID, для которого нет данных, добавляем дефолтный словарь
-        for tank_id in id:
-            if tank_id not in data:
-                data[tank_id] = {"level": "undefined", "name": "undefined"}
-                LoggerFactory.log(
-                    f"Танк не найден с параметрами id={tank_id}", level="DEBUG"
-                )
-        return data
-
     @classmethod
     async def add(cls, tank: dict):
+        # добавленная вручную техника не перезаписывается синхронизацией
         await cls.collection.replace_one(
-            filter={"tank_id": tank["tank_id"]}, replacement=tank, upsert=True
+            filter={"tank_id": tank["tank_id"]},
+            replacement={**tank, "admin": True},
+            upsert=True,
         )
 
+    @classmethod
+    async def sync(cls, tanks: list[dict]) -> int:
+        return await cls.sync_by_hash("tank_id", tanks)
+
 
 class Medal_DB(Connect):
     collection: AsyncCollection = Connect.db["Medal"]
+    indexes = [IndexModel([("name", ASCENDING)], unique=True)]
 
     @classmethod
     async def get(cls, name: str):
@@ -351,36 +786,58 @@ class Medal_DB(Connect):
             )
             return {"name": "undefined", "image": "undefined"}
 
-    @classmethod
-    async def get_list(cls, names: list[str]):
-        res = await cls.collection.find({"name": {"$in": names}}).to_list(
-            length=len(names)
-        )
-        res = {item["name"]: item["image"] for item in res}
-        return res
-
     @classmethod
     async def add(cls, medal: dict):
+        # добавленная вручную медаль не перезаписывается синхронизацией
         await cls.collection.replace_one(
-            filter={"name": medal["name"]}, replacement=medal, upsert=True
+            filter={"name": medal["name"]},
+            replacement={**medal, "admin": True},
+            upsert=True,
         )
 
+    @classmethod
+    async def sync(cls, medals: list[dict]) -> int:
+        return await cls.sync_by_hash("name", medals)
+
 
 class Client_DB(Connect):
     collection: AsyncCollection = Connect.db["Client"]
+    # Сессии, которые не читали CLIENT_SESSION_TTL секунд, удаляет сам Mongo
+    indexes = [
+        IndexModel(
+            [("last_access", ASCENDING)],
+            expireAfterSeconds=EnvConfig.CLIENT_SESSION_TTL,
+        ),
+    ]
+    track_access = True
 
     @classmethod
-    async def get(cls, session_id: str) -> UserDB | None:
+    def document(cls, user: UserDB) -> dict:
+        return {**user.model_dump(), "last_access": cls.utcnow()}
+
+    @classmethod
+    async def get(cls, session_id: str, touch: bool = True) -> UserDB | None:
         _id = cls.safe_object_id(session_id)
         res = await cls.collection.find_one(filter={"_id": _id})
         if res:
+            if touch:
+                await cls.touch(res)
             return UserDB.model_validate(res)
 
     @classmethod
     async def add(cls, user: UserDB) -> str:
-        result = await cls.collection.insert_one(user.model_dump())
+        result = await cls.collection.insert_one(cls.document(user))
         return str(result.inserted_id)
 
+    @classmethod
+    async def replace(cls, session_id: str, user: UserDB) -> bool:
+        """Атомарно заменяет снимок сессии, False если её уже нет."""
+        _id = cls.safe_object_id(session_id)
+        result = await cls.collection.find_one_and_replace(
+            {"_id": _id}, cls.document(user), projection={"_id": 1}
+        )
+        return result is not None
+
     @classmethod
     async def delete(cls, session_id: str) -> bool:
         _id = cls.safe_object_id(session_id)
@@ -388,3 +845,72 @@ class Client_DB(Connect):
         if result.deleted_count == 1:
             return True
         return False
+
+
+class Entity_DB(Connect):
+    """Постоянная карта (вид, регион, ключ) -> id игрока или клана."""
+
+    collection: AsyncCollection = Connect.db["Entity"]
+    indexes = [
+        IndexModel(
+            [("kind", ASCENDING), ("region", ASCENDING), ("key", ASCENDING)],
+            unique=True,
+        )
+    ]
+
+    @classmethod
+    async def get(cls, kind: str, region: str, key: str, newer_than: int = 0):
+        res = await cls.collection.find_one(
+            filter={
+                "kind": kind,
+                "region": region,
+                "key": key,
+                "updated_at": {"$gte": newer_than},
+            },
+            projection={"_id": 0, "entity_id": 1},
+        )
+        if res:
+            return res["entity_id"]
+
+    @classmethod
+    async def add(cls, kind: str, region: str, key: str, entity_id: int, ts: int):
+        await cls.collection.update_one(
+            filter={"kind": kind, "region": region, "key": key},
+            update={"$set": {"entity_id": entity_id, "updated_at": ts}},
+            upsert=True,
+        )
+
+    @classmethod
+    async def delete(cls, kind: str, region: str, key: str):
+        await cls.collection.delete_one(
+            filter={"kind": kind, "region": region, "key": key}
+        )
+
+
+# explain медленных команд выполняется через общий клиент
+command_monitor.attach(Connect.client)
+
+# Все репозитории, индексы которых создаются при старте
+REPOSITORIES: list[type[Connect]] = [
+    Player_sessions,
+    Player_all_sessions,
+    Player_daily,
+    Clan_sessions,
+    Clan_all_sessions,
+    Tank_DB,
+    Medal_DB,
+    Client_DB,
+    Entity_DB,
+]
+
+
+async def ensure_indexes():
+    for repository in REPOSITORIES:
+        await repository.ensure_indexes()
+
+
+async def index_report() -> dict[str, list[dict]]:
+    return {
+        repository.collection.name: await repository.index_stats()
+        for repository in REPOSITORIES
+    }
@@ -0,0 +1,127 @@
+import asyncio
+import time
+
+from prometheus_client import Counter
+from pymongo import InsertOne, ReplaceOne, UpdateOne
+from pymongo.asynchronous.collection import AsyncCollection
+from pymongo.errors import BulkWriteError, PyMongoError
+
+from utils.settings.config import EnvConfig
+from utils.settings.logger import LoggerFactory
+
+WriteOp = InsertOne | ReplaceOne | UpdateOne
+
+bulk_write_ops = Counter(
+    "bulk_write_ops",
+    "Operations flushed by BulkWriter",
+    ["collection", "result"],
+)
+
+
+class BulkWriter:
+    """Копит операции записи по коллекциям и отправляет их одним bulk_write.
+
+    Сброс происходит при накоплении `size` операций в коллекции, по таймеру
+    раз в `interval` секунд и обязательно при выходе из `async with`.
+    Запись неупорядоченная: ошибка одного документа не останавливает
+    остальные, такие документы учитываются в `failed`.
+    """
+
+    # сколько ошибок по документам логировать за один сброс
+    LOG_ERRORS = 5
+
+    def __init__(
+        self,
+        name: str,
+        size: int = EnvConfig.BULK_WRITE_SIZE,
+        interval: float = EnvConfig.BULK_WRITE_INTERVAL,
+    ):
+        self.name = name
+        self.size = size
+        self.interval = interval
+        self._queues: dict[str, list[WriteOp]] = {}
+        self._collections: dict[str, AsyncCollection] = {}
+        self._timer: asyncio.Task | None = None
+        self._started = 0.0
+        self.written = 0
+        self.failed = 0
+        self.flushes = 0
+
+    async def __aenter__(self) -> "BulkWriter":
+        self._started = time.monotonic()
+        if self.interval > 0:
+            self._timer = asyncio.create_task(self._periodic())
+        return self
+
+    async def __aexit__(self, *exc_info):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        await self.flush()
+        LoggerFactory.log(
+            f"{self.name}: записано {self.written}, ошибок {self.failed}, "
+            f"запросов {self.flushes} за {time.monotonic() - self._started:.1f}с"
+        )
+
+    async def _periodic(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            await self.flush()
+
+    async def add(self, collection: AsyncCollection, *ops: WriteOp):
+        name = collection.name
+        self._collections[name] = collection
+        queue = self._queues.setdefault(name, [])
+        queue.extend(ops)
+        if len(queue) >= self.size:
+            await self._flush(name)
+
+    async def flush(self):
+        await asyncio.gather(*(self._flush(name) for name in list(self._queues)))
+
+    async def _flush(self, name: str):
+        ops = self._queues.get(name)
+        if not ops:
+            return
+        # забираем очередь до await, чтобы новые операции шли в следующий сброс
+        self._queues[name] = []
+        collection = self._collections[name]
+        self.flushes += 1
+        try:
+            await collection.bulk_write(ops, ordered=False)
+        except BulkWriteError as e:
+            errors = e.details.get("writeErrors", [])
+            self._account(name, len(ops) - len(errors), len(errors))
+            for error in errors[: self.LOG_ERRORS]:
+                LoggerFactory.log(
+                    f"{self.name}: {name}[{error['index']}] не записан: "
+                    f"{error.get('errmsg')} ({ops[error['index']]!r:.200})",
+                    level="ERROR",
+                )
+            if len(errors) > self.LOG_ERRORS:
+                LoggerFactory.log(
+                    f"{self.name}: {name} ещё ошибок {len(errors) - self.LOG_ERRORS}",
+                    level="ERROR",
+                )
+        except PyMongoError as e:
+            self._account(name, 0, len(ops))
+            LoggerFactory.log(
+                f"{self.name}: {name} сброс {len(ops)} операций не удался: {e}",
+                level="ERROR",
+            )
+        else:
+            self._account(name, len(ops), 0)
+
+    def _account(self, name: str, written: int, failed: int):
+        self.written += written
+        self.failed += failed
+        bulk_write_ops.labels(collection=name, result="ok").inc(written)
+        bulk_write_ops.labels(collection=name, result="error").inc(failed)
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "written": self.written,
+            "failed": self.failed,
+            "flushes": self.flushes,
+            "pending": sum(len(queue) for queue in self._queues.values()),
+        }
@@ -0,0 +1,156 @@
+import asyncio
+import json
+import time
+from collections import deque
+
+from bson import json_util
+from prometheus_client import Histogram
+from pymongo import monitoring
+from pymongo.errors import PyMongoError
+
+from utils.settings.config import EnvConfig
+from utils.settings.logger import LoggerFactory
+
+mongo_command_seconds = Histogram(
+    "mongo_command_seconds",
+    "Mongo command latency",
+    ["collection", "command", "status"],
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5),
+)
+
+# Команды над коллекциями: имя коллекции лежит в значении имени команды
+COLLECTION_COMMANDS = {
+    "find",
+    "aggregate",
+    "count",
+    "distinct",
+    "findAndModify",
+    "insert",
+    "update",
+    "delete",
+    "createIndexes",
+}
+# Команды, для которых медленный вызов дополняется планом explain
+EXPLAIN_COMMANDS = {"find", "aggregate", "count", "distinct", "update", "delete"}
+
+
+def command_filter(name: str, command: dict):
+    """Часть команды, по которой видно, что именно искали."""
+    match name:
+        case "find" | "distinct":
+            return command.get("filter", command.get("query"))
+        case "count" | "findAndModify":
+            return command.get("query")
+        case "aggregate":
+            return command.get("pipeline")
+        case "update" | "delete":
+            key = "updates" if name == "update" else "deletes"
+            return [item.get("q") for item in command.get(key, [])[:3]]
+    return None
+
+
+class CommandMonitor(monitoring.CommandListener):
+    """Слушатель команд pymongo: гистограммы задержек и журнал медленных
+    запросов с планом выполнения.
+    """
+
+    def __init__(self, threshold_ms: float, size: int):
+        self.threshold = threshold_ms / 1000
+        self.slow: deque[dict] = deque(maxlen=size)
+        self._started: dict[tuple, tuple[str, str, dict | None]] = {}
+        self._client = None
+        self._explaining: set[asyncio.Task] = set()
+
+    def attach(self, client):
+        """Клиент, через который выполняется explain медленных команд."""
+        self._client = client
+
+    def started(self, event: monitoring.CommandStartedEvent):
+        name = event.command_name
+        if name == "getMore":
+            collection = event.command.get("collection")
+        elif name in COLLECTION_COMMANDS:
+            collection = event.command.get(name)
+        else:
+            return
+        command = event.command if name in EXPLAIN_COMMANDS else None
+        self._started[(event.connection_id, event.request_id)] = (
+            collection,
+            event.database_name,
+            command,
+        )
+
+    def succeeded(self, event: monitoring.CommandSucceededEvent):
+        self._finish(event, "ok")
+
+    def failed(self, event: monitoring.CommandFailedEvent):
+        self._finish(event, "error")
+
+    def _finish(self, event, status: str):
+        started = self._started.pop((event.connection_id, event.request_id), None)
+        if started is None:
+            return
+        collection, database, command = started
+        duration = event.duration_micros / 1_000_000
+        mongo_command_seconds.labels(
+            collection=collection, command=event.command_name, status=status
+        ).observe(duration)
+        if duration < self.threshold:
+            return
+        entry = {
+            "time": time.time(),
+            "collection": collection,
+            "command": event.command_name,
+            "status": status,
+            "duration_ms": round(duration * 1000, 1),
+            "filter": (
+                self._jsonable(command_filter(event.command_name, command))
+                if command
+                else None
+            ),
+            "plan": None,
+        }
+        self.slow.append(entry)
+        if command is not None:
+            self._schedule_explain(entry, database, command)
+
+    def _schedule_explain(self, entry: dict, database: str, command: dict):
+        # explain не чаще двух одновременно, чтобы не нагружать базу ещё сильнее
+        if self._client is None or len(self._explaining) >= 2:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        task = loop.create_task(self._explain(entry, database, command))
+        self._explaining.add(task)
+        task.add_done_callback(self._explaining.discard)
+
+    async def _explain(self, entry: dict, database: str, command: dict):
+        # служебные поля драйвера ($db, lsid, $clusterTime...) explain не принимает
+        command = {
+            key: value
+            for key, value in command.items()
+            if not key.startswith("$") and key not in ("lsid", "txnNumber")
+        }
+        try:
+            result = await self._client[database].command(
+                {"explain": command, "verbosity": "queryPlanner"}
+            )
+            entry["plan"] = self._jsonable(
+                result.get("queryPlanner", {}).get("winningPlan", result)
+            )
+        except PyMongoError as e:
+            LoggerFactory.log(f"explain {entry['collection']}: {e}", level="DEBUG")
+
+    @staticmethod
+    def _jsonable(value):
+        # ObjectId, datetime и т.п. в виде, пригодном для JSON ответа
+        return json.loads(json_util.dumps(value))
+
+    def report(self, limit: int = 50) -> list[dict]:
+        """Последние медленные команды, свежие первыми."""
+        return list(reversed(self.slow))[:limit]
+
+
+command_monitor = CommandMonitor(EnvConfig.MONGO_SLOW_MS, EnvConfig.MONGO_SLOW_BUFFER)
@@ -1,3 +1,6 @@
+import math
+
+
 class BaseCustomException(Exception):
     def __init__(self, message: str = None, *args, **kwargs):
         # Собираем аргументы в строку, если они есть
@@ -141,6 +144,31 @@ class ServerIsTemporarilyUnavailable(BaseCustomException):
             super().__init__(message="API временно не доступно", **kwargs)
 
 
+class DeadlineExceeded(BaseCustomException):
+    def __init__(self, message=None, **kwargs):
+        if message:
+            super().__init__(message=message, **kwargs)
+        else:
+            super().__init__(message="Превышено время ожидания ответа", **kwargs)
+
+
+class CircuitOpen(BaseCustomException):
+    def __init__(self, message=None, **kwargs):
+        if message:
+            super().__init__(message=message, **kwargs)
+        else:
+            super().__init__(message="Внешний сервис временно отключён", **kwargs)
+
+
+class Overloaded(BaseCustomException):
+    def __init__(self, message=None, retry_after: float = 1, **kwargs):
+        self.headers = {"Retry-After": str(max(1, math.ceil(retry_after)))}
+        if message:
+            super().__init__(message=message, **kwargs)
+        else:
+            super().__init__(message="Сервер перегружен, повторите позже", **kwargs)
+
+
 EXCEPTION_HANDLERS = {
     NotFoundPlayerDB: (404, "Игрок не отслеживаеться"),
     InvalidAdminToken: (401, "Неверный токен админа"),
@@ -150,6 +178,9 @@ EXCEPTION_HANDLERS = {
     ClanNotFound: (404, "Клан не найден"),
     PlayerNotFound: (404, "Игрок не найден"),
     ServerIsTemporarilyUnavailable: (504, "Сервер с данными временно не доступен"),
+    DeadlineExceeded: (504, "Превышено время ожидания ответа"),
+    CircuitOpen: (503, "Сервер с данными временно отключён"),
+    Overloaded: (503, "Сервер перегружен, повторите позже"),
     RequestError: (400, "Не обработанная ошибка внешнего запроса"),
     ValidError: (422, "Не валидные данные"),
     NotFoundSessionId: (404, "Сессия не найдена"),
@@ -9,7 +9,12 @@ from utils.models.base_models import Singleton
 from utils.server.admin.schemas import CreateTank
 from utils.settings.logger import LoggerFactory
 from datetime import datetime
-from utils.database.Mongo import Tank_DB
+from utils.database.Mongo import Tank_DB, index_report
+from utils.database.monitoring import command_monitor
+from utils.api.wotb import APIServer
+from utils.api.admission import admission
+from utils.interface.player import PlayerSession
+from utils.service.catalog import catalog
 
 
 class MetricsInterface(Singleton):
@@ -74,6 +79,33 @@ class MetricsInterface(Singleton):
     async def get_external_api_calls(self):
         return self.get_counter_value("external_api_requests")
 
+    async def get_single_flight_stats(self):
+        return {
+            "api": APIServer().single_flight.stats(),
+            "add_player": PlayerSession.pending_players.stats(),
+        }
+
+    async def get_limiter_stats(self):
+        return APIServer().limiter.stats()
+
+    async def get_breaker_stats(self):
+        return APIServer().breakers.stats()
+
+    async def get_app_id_stats(self):
+        return APIServer().app_ids.stats()
+
+    async def get_resolver_stats(self):
+        return APIServer().resolver.stats()
+
+    async def get_admission_stats(self):
+        return admission.stats()
+
+    async def get_index_stats(self):
+        return await index_report()
+
+    async def get_slow_queries(self, limit: int):
+        return command_monitor.report(limit)
+
     async def collect_all(self, limit):
         data = await self.get_active_users_14d()
         return {
@@ -86,6 +118,12 @@ class MetricsInterface(Singleton):
             "active_users_list": data,
             "external_api_calls": await self.get_external_api_calls(),
             "custom_api_calls": await self.get_custom_api_call_count(),
+            "single_flight": await self.get_single_flight_stats(),
+            "limiters": await self.get_limiter_stats(),
+            "breakers": await self.get_breaker_stats(),
+            "resolver": await self.get_resolver_stats(),
+            "admission": await self.get_admission_stats(),
+            "app_ids": await self.get_app_id_stats(),
             "last_1000_logs": await self.get_last_logs(limit),
         }
 
@@ -111,4 +149,5 @@ class AdminInterface:
         tank_data.images.preview = path_small
         tank_data.images.normal = path_big
         await Tank_DB.add(tank_data.model_dump())
+        await catalog.publish()
         return tank_data
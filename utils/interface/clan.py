@@ -1,9 +1,10 @@
-from asyncio import gather
-
 from utils.settings.logger import LoggerFactory
 from ..models.clan import Clan, ClanDB, ClanDetails, ClanTop, RestClan
 from ..database.Mongo import Clan_sessions, Clan_all_sessions
+from ..database.bulk import BulkWriter
 from ..api.wotb import APIServer
+from ..api.limiter import Priority, set_priority
+from ..api.fields import FieldProfile
 from .player import PlayerSession
 from ..error import *
 
@@ -42,15 +43,12 @@ class ClanInterface:
 
     async def get_clan_details(self) -> ClanDB:
         res = await self._get_clan_details()
-        task = [
-            self.player_interface(id=player_id, reg=self.region).get_player_info()
-            for player_id in res.members_ids
-        ]
-        data = await gather(*task, return_exceptions=True)
+        members = await self.session.get_general_many(
+            self.region, res.members_ids, fields=FieldProfile.CLAN_MEMBER
+        )
         data = [
-            result for result in data if not isinstance(result, BaseCustomException)
+            members[player_id] for player_id in res.members_ids if player_id in members
         ]
-        data = [user.acount for user in data]
         return ClanDB(**res.model_dump(), members=data, region=self.region)
 
     async def reset(self):
@@ -96,19 +94,25 @@ class ClanInterface:
 
     @classmethod
     async def update_clan_db(cls, _all: bool = True):
+        set_priority(Priority.BULK, flow="update_clan_db")
         if _all:
             LoggerFactory.log("Start update clan all db")
             LoggerFactory.log("Start update clan db")
         else:
             LoggerFactory.log("Start update clan all db")
-        async for batch in Clan_sessions.find_all():
-            for clan in batch:
-                clan = await cls(
-                    name=clan.name, region=clan.region, clan_id=clan.clan_id
-                ).get_clan_details()
-                if _all:
-                    await Clan_sessions.add(clan)
-                await Clan_all_sessions.add(clan)
+        async with BulkWriter("update_clan_db") as writer:
+            async for batch in Clan_sessions.find_refs():
+                for clan in batch:
+                    clan = await cls(
+                        name=clan.name, region=clan.region, clan_id=clan.clan_id
+                    ).get_clan_details()
+                    if _all:
+                        await writer.add(
+                            Clan_sessions.collection, Clan_sessions.add_op(clan)
+                        )
+                    await writer.add(
+                        Clan_all_sessions.collection, Clan_all_sessions.add_op(clan)
+                    )
         if _all:
             LoggerFactory.log("End update clan all db")
             LoggerFactory.log("End update clan db")
@@ -33,7 +33,17 @@ class ClientInterface(PlayerSession):
             raise NotFoundPlayerDB(session_id=self.session_id)
 
     async def reset(self) -> str:
-        await self.get_player_DB()
-        self.user = self.old_user
-        await self.delete_session()
-        return await self.add_player()
+        """Новый снимок сохраняется под тем же session_id.
+
+        Читаем без обновления last_access: замена всё равно его выставит.
+        """
+        if not self.session_id:
+            raise TypeError("session_id not found")
+        self.old_user = await self.player_repo.get(self.session_id, touch=False)
+        if not self.old_user:
+            raise NotFoundPlayerDB(session_id=self.session_id)
+        self.user = self.old_user.model_copy()
+        await self.get_player_details()
+        if not await self.player_repo.replace(self.session_id, self.user):
+            raise NotFoundPlayerDB(session_id=self.session_id)
+        return self.session_id
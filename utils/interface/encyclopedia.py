@@ -0,0 +1,52 @@
+import time
+
+from ..api.limiter import Priority, set_priority
+from ..api.wotb import APIServer
+from ..database.Mongo import Medal_DB, Tank_DB
+from ..models.encyclopedia import AchievementInfo, VehicleInfo
+from ..service.catalog import catalog
+from ..settings.logger import LoggerFactory
+
+
+class EncyclopediaInterface:
+    """Синхронизация справочников техники и медалей с WG API."""
+
+    session = APIServer()
+
+    @staticmethod
+    def parse_vehicles(data: dict) -> list[VehicleInfo]:
+        return [VehicleInfo.model_validate(item) for item in data.values()]
+
+    @staticmethod
+    def parse_achievements(data: dict) -> list[AchievementInfo]:
+        medals = []
+        for name, item in data.items():
+            # у медалей со степенями картинка своя для каждой степени
+            if item.get("options"):
+                medals.extend(
+                    AchievementInfo.model_validate(i) for i in item["options"]
+                )
+            else:
+                medals.append(AchievementInfo(name=name, image=item.get("image")))
+        return medals
+
+    @classmethod
+    async def sync(cls) -> dict[str, int]:
+        set_priority(Priority.BULK, flow="encyclopedia")
+        LoggerFactory.log("Start sync encyclopedia")
+        start = time.monotonic()
+        vehicles, achievements = await cls.session.get_encyclopedia()
+        tanks = [item.model_dump() for item in cls.parse_vehicles(vehicles)]
+        medals = [item.model_dump() for item in cls.parse_achievements(achievements)]
+        result = {
+            "tanks": await Tank_DB.sync(tanks),
+            "medals": await Medal_DB.sync(medals),
+        }
+        if any(result.values()):
+            await catalog.publish()
+        LoggerFactory.log(
+            f"End sync encyclopedia: техника {result['tanks']}/{len(tanks)}, "
+            f"медали {result['medals']}/{len(medals)} "
+            f"за {time.monotonic() - start:.1f}с"
+        )
+        return result
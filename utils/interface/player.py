@@ -1,20 +1,24 @@
+import asyncio
+import contextvars
 from asyncio import gather
+from collections import defaultdict
 from datetime import datetime, timedelta
-from itertools import zip_longest
-
-
-from pydantic import BaseModel
 
 from utils.database.admin import add_active_user
-from utils.models.response_model import General, Medal, Medals, RestUser, TopPlayer
+from utils.models.response_model import General, RestUser, TopPlayer
 from ..models.player import (
     PlayerDetails,
+    PlayerRef,
     UserDB,
     RestPlayer,
 )
-from ..database.Mongo import Player_sessions, Tank_DB, Player_all_sessions, Medal_DB
+from ..database.Mongo import Player_sessions, Player_all_sessions, Player_daily
+from ..database.bulk import BulkWriter
 from ..api.wotb import APIServer
+from ..api.limiter import Priority, set_priority
 from ..error import *
+from ..service.catalog import catalog
+from ..service.single_flight import SingleFlight
 
 
 from ..settings.logger import LoggerFactory
@@ -23,6 +27,7 @@ from ..settings.logger import LoggerFactory
 class PlayerSession:
     session = APIServer()
     player_repo = Player_sessions
+    pending_players = SingleFlight("add_player")
 
     def __init__(
         self,
@@ -53,6 +58,17 @@ class PlayerSession:
         await self.player_repo.update(self.user)
         return True
 
+    def add_player_background(self) -> asyncio.Task | None:
+        key = (self.region, (self.name or str(self.id)).lower())
+        if key in self.pending_players:
+            return None
+        # пустой контекст: добавление переживает срок запроса, который его начал
+        return asyncio.create_task(
+            self.pending_players.do(key, self.add_player),
+            name="add_player",
+            context=contextvars.Context(),
+        )
+
     async def get_player_DB(self):
         self.old_user = await self.player_repo.get(
             self.name, self.id, self.region, self.user.access_token
@@ -75,27 +91,26 @@ class PlayerSession:
         await self.get_player_medal()
         return self.user
 
-    async def get_player_details(self, rating=True):
+    async def get_player_details(
+        self,
+        rating=True,
+        general: UserDB | None = None,
+        medal: dict[str, int] | None = None,
+    ):
         try:
-            data = await self.session.get_details_tank(self.user, rating=rating)
+            data = await self.session.get_details_tank(
+                self.user, rating=rating, general=general
+            )
         except InvalidAccessToken as e:
             self.user.access_token = None
             data = await self.session.get_details_tank(self.user)
         self.user = data
-        await self.get_player_medal()
-
-    async def get_player_medal(self):
-        data = await self.session.get_medal(self.user)
-        medal_db = await Medal_DB.get_list(list(data.keys()))
-        medals = []
-        for key, val in data.items():
-            image = medal_db.get(key)
-            if image is None or not isinstance(image, str):
-                image = "https://example.com/default-image.png"
-            medals.append(Medal(name=key, count=val, image=image))
+        await self.get_player_medal(medal)
 
-        medals = Medals(medals=medals)
-        self.user.medal = medals
+    async def get_player_medal(self, data: dict[str, int] | None = None):
+        if data is None:
+            data = await self.session.get_medal(self.user)
+        self.user.medal = data
 
     async def _results(self, trigger: bool = True):
         if trigger:
@@ -117,35 +132,10 @@ class PlayerSession:
         session = await self._results(trigger=trigger)
         now = await self._now_stats()
         update = await self._update_stats()
-        if now.tanks.now:
-            tasks = [tank.tank_id for tank in now.tanks.now]
-            data = await Tank_DB.get_list_id(tasks)
-
-            def update_object_with_data(obj: BaseModel, update=None):
-                if obj is None:
-                    return
-                if update is None and hasattr(obj, "tank_id") and obj.tank_id in data:
-                    update = data[obj.tank_id]
-                if not update:
-                    return
-                for key, value in update.items():
-                    if not hasattr(obj, key):
-                        continue
-                    current = getattr(obj, key)
-                    if isinstance(current, BaseModel) and isinstance(value, dict):
-                        update_object_with_data(current, value)
-                    else:
-                        setattr(obj, key, value)
-
-            for ses, now_item, upd in zip_longest(
-                session.tanks.session,
-                now.tanks.now,
-                update.tanks.session,
-                fillvalue=None,
-            ):
-                update_object_with_data(ses)
-                update_object_with_data(now_item)
-                update_object_with_data(upd)
+        await catalog.ensure_fresh()
+        catalog.fill_tanks(session.tanks.session)
+        catalog.fill_tanks(now.tanks.now)
+        catalog.fill_tanks(update.tanks.session)
         session = self.update_model_rest(session, update, now, "general")
         session = self.update_model_rest(session, update, now, "tanks")
 
@@ -163,9 +153,10 @@ class PlayerSession:
 
     async def reset(self, isAdmin=False):
         await self.get_player_DB()
-        self.user = self.old_user
+        # копия: get_player_details может сбросить токен у переданного user
+        self.user = self.old_user.model_copy()
         await self.get_player_details()
-        await self.player_repo.add(self.user)
+        await self.player_repo.add(self.user, previous=self.old_user)
         data = {
             "player_id": self.user.player_id,
             "name": self.user.name,
@@ -216,7 +207,7 @@ class PlayerSession:
 
     @classmethod
     async def top_players(cls, limit, parameter, start_day):
-        data = await Player_all_sessions.get_top(
+        data = await Player_daily.get_top(
             limit=limit,
             parameter=parameter,
             start_day=start_day,
@@ -232,28 +223,81 @@ class PlayerSession:
             for item in data
         ]
 
+    @classmethod
+    async def prefetch(
+        cls, users: list[UserDB | PlayerRef]
+    ) -> tuple[dict[int, UserDB], dict[int, dict[str, int]]]:
+        """Общая статистика и медали пачкой по 100 игроков за запрос,
+        заодно обновляются места в рейтинге в кеше.
+
+        Игроки с access_token получают общую статистику отдельным запросом,
+        чтобы не потерять приватные поля.
+        """
+        regions = defaultdict(list)
+        for user in users:
+            if user.player_id:
+                regions[user.region].append(user)
+        generals, medals = {}, {}
+        for region, items in regions.items():
+            ids = [user.player_id for user in items]
+            public_ids = [user.player_id for user in items if not user.access_token]
+            try:
+                general, medal, _ = await gather(
+                    cls.session.get_general_many(region, public_ids),
+                    cls.session.get_medal_many(region, ids),
+                    cls.session.refresh_ratings(region, ids),
+                )
+            except Exception as e:
+                LoggerFactory.log(
+                    f"Не удалось получить данные пачкой: {e}", level="ERROR"
+                )
+                continue
+            for player_id, acount in general.items():
+                generals[player_id] = UserDB(
+                    region=region,
+                    player_id=player_id,
+                    name=acount.nickname,
+                    acount=acount,
+                )
+            medals.update(medal)
+        return generals, medals
+
     @classmethod
     async def update_player_db(cls, _all=True):
+        set_priority(Priority.BULK, flow="update_player_db")
         if _all:
             LoggerFactory.log("Start update player all db")
             LoggerFactory.log("Start update player db")
         else:
             LoggerFactory.log("Start update player all db")
-        async for batch in cls.player_repo.find_all():
-            for user in batch:
-                user = cls(
-                    name=user.name,
-                    reg=user.region,
-                    id=user.player_id,
-                    access_token=user.access_token,
-                )
-                try:
-                    await user.get_player_details()
-                    if _all:
-                        await Player_sessions.add(user.user)
-                    await Player_all_sessions.add([user.user])
-                except Exception as e:
-                    LoggerFactory.log(str(e), level="CRITICAL")
+        async with BulkWriter("update_player_db") as writer:
+            async for batch in cls.player_repo.find_refs():
+                generals, medals = await cls.prefetch(batch)
+                for user in batch:
+                    player_id = user.player_id
+                    user = cls(
+                        name=user.name,
+                        reg=user.region,
+                        id=user.player_id,
+                        access_token=user.access_token,
+                    )
+                    try:
+                        await user.get_player_details(
+                            general=generals.get(player_id),
+                            medal=medals.get(player_id),
+                        )
+                        if _all:
+                            await writer.add(
+                                Player_sessions.collection,
+                                Player_sessions.add_op(user.user),
+                            )
+                        await writer.add(
+                            Player_all_sessions.collection,
+                            Player_all_sessions.add_op(user.user),
+                        )
+                    except Exception as e:
+                        LoggerFactory.log(str(e), level="CRITICAL")
+        await cls.rollup_daily()
         if _all:
             LoggerFactory.log("End update player all db")
             LoggerFactory.log("End update player db")
@@ -261,18 +305,29 @@ class PlayerSession:
             LoggerFactory.log("End update player all db")
 
     @classmethod
-    async def update_player_token(cls):
-        LoggerFactory.log("Start update player token")
-        async for batch in cls.player_repo.find_all():
-            tasks = []
+    async def rollup_daily(cls, timestamp: int | None = None):
+        """Дневные итоги по снимкам, сделанным за сутки timestamp."""
+        day = Player_daily.day_of(timestamp or int(datetime.now().timestamp()))
+        async with BulkWriter("rollup_daily") as writer:
+            count = await Player_daily.rollup(writer, day)
+        LoggerFactory.log(f"Дневные итоги за {day}: игроков {count}")
 
-            for user in batch:
-                if user.access_token is None:
-                    continue
-                tasks.append(cls.session.longer_token(user))
-            updated_players = await gather(*tasks)
+    @classmethod
+    async def archive_dormant(cls):
+        count = await cls.player_repo.archive_dormant()
+        LoggerFactory.log(f"Архивировано неактивных игроков: {count}")
 
-            await gather(
-                *[cls.player_repo.update(player) for player in updated_players]
-            )
+    @classmethod
+    async def update_player_token(cls):
+        set_priority(Priority.BULK, flow="update_player_token")
+        LoggerFactory.log("Start update player token")
+        async with BulkWriter("update_player_token") as writer:
+            async for batch in cls.player_repo.find_refs():
+                users = [user for user in batch if user.access_token is not None]
+                # longer_token сам записывает новый токен в user
+                await gather(*[cls.session.longer_token(user) for user in users])
+                await writer.add(
+                    cls.player_repo.collection,
+                    *[cls.player_repo.update_token_op(user) for user in users],
+                )
         LoggerFactory.log("End update player token")
@@ -1,4 +1,5 @@
 import asyncio
+import contextvars
 from typing import Literal
 from pydantic import BaseModel, computed_field
 from utils.cache.redis_cache import redis_cache
@@ -6,11 +7,14 @@ from utils.database.Mongo import (
     Clan_all_sessions,
     Clan_sessions,
     Player_all_sessions,
+    Player_daily,
     Player_sessions,
 )
+from utils.database.bulk import BulkWriter
 from utils.interface.clan import ClanInterface
 from utils.interface.player import PlayerSession
 from uuid import uuid4
+from utils.api.limiter import Priority, set_priority
 from loguru import logger
 
 
@@ -43,9 +47,16 @@ class TaskInterface:
     def create_key(self) -> str:
         return str(uuid4())
 
-    async def create_task(self, flag: Literal["player", "clan"]):
+    async def create_task(self, flag: Literal["player", "clan", "daily"]):
         _id = self.create_key()
-        if flag == "player":
+        if flag == "daily":
+            task = Task(
+                id=_id,
+                status="pending",
+                total_tasks=len(await self.history_players()),
+                done_tasks=0,
+            )
+        elif flag == "player":
             task = Task(
                 id=_id,
                 status="pending",
@@ -70,28 +81,39 @@ class TaskInterface:
         await self.cash.set(task.id, task.model_dump_json())
 
     async def count_player(self):
-        return await Player_sessions.collection.count_documents({})
+        return await Player_sessions.collection.count_documents(
+            Player_sessions.active_filter
+        )
+
+    async def history_players(self) -> list[int]:
+        return await Player_all_sessions.collection.distinct("player_id")
 
     async def count_clan(self):
         return await Clan_sessions.collection.count_documents({})
 
     async def update_clan_db(self, _id: str, _all: bool = True):
+        set_priority(Priority.BULK, flow="update_clan_db")
         if _all:
             logger.info("Start update clan all db")
             logger.info("Start update clan db")
         else:
             logger.info("Start update clan all db")
-        async for batch in Clan_sessions.find_all():
-            for clan in batch:
-                clan = await self.clan_interface(
-                    name=clan.name, region=clan.region, clan_id=clan.clan_id
-                ).get_clan_details()
-                if _all:
-                    await Clan_sessions.add(clan)
-                await Clan_all_sessions.add(clan)
-                task = await self.get_task(_id)
-                task.add_done_task()
-                await self.set_task(task)
+        async with BulkWriter("update_clan_db") as writer:
+            async for batch in Clan_sessions.find_refs():
+                for clan in batch:
+                    clan = await self.clan_interface(
+                        name=clan.name, region=clan.region, clan_id=clan.clan_id
+                    ).get_clan_details()
+                    if _all:
+                        await writer.add(
+                            Clan_sessions.collection, Clan_sessions.add_op(clan)
+                        )
+                    await writer.add(
+                        Clan_all_sessions.collection, Clan_all_sessions.add_op(clan)
+                    )
+                    task = await self.get_task(_id)
+                    task.add_done_task()
+                    await self.set_task(task)
         task = await self.get_task(_id)
         task.done()
         await self.set_task(task)
@@ -102,6 +124,7 @@ class TaskInterface:
             logger.info("End update clan all db")
 
     async def update_player_db(self, _id: str, _all: bool = True):
+        set_priority(Priority.BULK, flow="update_player_db")
         if _all:
             logger.info("Start update player all db")
             logger.info("Start update player db")
@@ -109,7 +132,7 @@ class TaskInterface:
             logger.info("Start update player all db")
         semaphore = asyncio.Semaphore(4)
 
-        async def process_user(user_data):
+        async def process_user(writer, user_data, generals, medals):
             async with semaphore:
                 user = self.player_interface(
                     name=user_data.name,
@@ -118,10 +141,19 @@ class TaskInterface:
                     access_token=user_data.access_token,
                 )
                 try:
-                    await user.get_player_details()
+                    await user.get_player_details(
+                        general=generals.get(user_data.player_id),
+                        medal=medals.get(user_data.player_id),
+                    )
                     if _all:
-                        await Player_sessions.add(user.user)
-                    await Player_all_sessions.add([user.user])
+                        await writer.add(
+                            Player_sessions.collection,
+                            Player_sessions.add_op(user.user),
+                        )
+                    await writer.add(
+                        Player_all_sessions.collection,
+                        Player_all_sessions.add_op(user.user),
+                    )
 
                     task = await self.get_task(_id)
                     task.add_done_task()
@@ -129,12 +161,15 @@ class TaskInterface:
                 except Exception as e:
                     logger.critical("Exception: {}", str(e))
 
-        tasks = []
-        async for batch in Player_sessions.find_all():
-            for user_data in batch:
-                tasks.append(process_user(user_data))
+        async with BulkWriter("update_player_db") as writer:
+            tasks = []
+            async for batch in Player_sessions.find_refs():
+                generals, medals = await self.player_interface.prefetch(batch)
+                for user_data in batch:
+                    tasks.append(process_user(writer, user_data, generals, medals))
 
-        await asyncio.gather(*tasks)  # ✅ запускаем всё параллельно
+            await asyncio.gather(*tasks)  # ✅ запускаем всё параллельно
+        await self.player_interface.rollup_daily()
         task = await self.get_task(_id)
         task.done()
         await self.set_task(task)
@@ -144,11 +179,41 @@ class TaskInterface:
         else:
             logger.info("End update player all db")
 
+    async def backfill_daily(self, _id: str):
+        """Дневные итоги за всю историю Session_all, игроки параллельно."""
+        set_priority(Priority.BULK, flow="backfill_daily")
+        logger.info("Start backfill daily")
+        semaphore = asyncio.Semaphore(8)
+
+        async def process_player(writer, player_id):
+            async with semaphore:
+                try:
+                    await Player_daily.backfill_player(writer, player_id)
+                except Exception as e:
+                    logger.critical("Exception: {}", str(e))
+                task = await self.get_task(_id)
+                task.add_done_task()
+                await self.set_task(task)
+
+        async with BulkWriter("backfill_daily") as writer:
+            await asyncio.gather(
+                *[
+                    process_player(writer, player_id)
+                    for player_id in await self.history_players()
+                ]
+            )
+        task = await self.get_task(_id)
+        task.done()
+        await self.set_task(task)
+        logger.info("End backfill daily")
+
     async def reset(self, flag: Literal["player", "clan"], **kwargs):
         task = Task(id=self.create_key(), status="done", total_tasks=1, done_tasks=1)
         await self.set_task(task)
         if flag == "player":
-            asyncio.create_task(self.player_interface(**kwargs).reset())
+            job = self.player_interface(**kwargs).reset()
         else:
-            asyncio.create_task(self.clan_interface(**kwargs).reset())
+            job = self.clan_interface(**kwargs).reset()
+        # пустой контекст: сброс не ограничен сроком HTTP запроса
+        asyncio.create_task(job, context=contextvars.Context())
         return task
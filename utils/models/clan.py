@@ -14,6 +14,14 @@ class Clan(BaseModel):
     members_count: int
 
 
+class ClanRef(BaseModel):
+    """Поля клана, нужные фоновым задачам, без состава."""
+
+    region: str
+    name: str
+    clan_id: int
+
+
 class ClanDetails(BaseModel):
     clan_id: int
     created_at: int
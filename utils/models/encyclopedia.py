@@ -0,0 +1,19 @@
+from pydantic import BaseModel
+
+from utils.models.response_model import Images
+
+
+class VehicleInfo(BaseModel):
+    """Техника из encyclopedia/vehicles в виде, в котором хранится в Tank_DB."""
+
+    tank_id: int
+    name: str
+    nation: str
+    tier: int
+    is_premium: bool
+    images: Images
+
+
+class AchievementInfo(BaseModel):
+    name: str
+    image: str | None = None
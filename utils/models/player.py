@@ -1,5 +1,5 @@
 from datetime import datetime
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, field_validator
 from decimal import Decimal
 
 from utils.models.response_model import General, Medals, Region, RestUser
@@ -47,10 +47,18 @@ class UserDB(BaseModel, Session):
     player_id: int | None = None
     access_token: str | None = None
     acount: PlayerDetails | PlayerModel = None
-    medal: Medals = Medals()
+    # {название медали: количество}
+    medal: dict[str, int] = {}
 
     timestamp: int = Field(default_factory=lambda: int(datetime.now().timestamp()))
 
+    @field_validator("medal", mode="before")
+    def legacy_medals(cls, v):
+        # старые снимки хранили список {name, image, count}
+        if isinstance(v, dict) and isinstance(v.get("medals"), list):
+            return {item["name"]: item["count"] for item in v["medals"]}
+        return v
+
     def __sub__(self, other):
         if not isinstance(other, self.__class__):
             return NotImplemented
@@ -58,7 +66,7 @@ class UserDB(BaseModel, Session):
             update={
                 "acount": self.acount - other.acount,
                 "timestamp": self.timestamp - other.timestamp,
-                "medal": self.medal - other.medal,
+                "medal": Medals.diff(self.medal, other.medal),
             },
             deep=True,
         )
@@ -67,10 +75,19 @@ class UserDB(BaseModel, Session):
         model = self.acount.result(type=type)
         model.region = Region(self.region)
         model.time = self.timestamp
-        model.medals = self.medal
+        model.medals = Medals.from_counts(self.medal)
         return model
 
 
+class PlayerRef(BaseModel):
+    """Поля игрока, нужные фоновым задачам, без снимка статистики."""
+
+    region: str | None
+    name: str | None
+    player_id: int | None = None
+    access_token: str | None = None
+
+
 class RestPlayer(BaseModel):
     id: int
     name: str
@@ -1,6 +1,13 @@
 from enum import Enum
 from typing import Callable
-from pydantic import BaseModel, PrivateAttr, model_validator, Field, ConfigDict
+from pydantic import (
+    BaseModel,
+    PrivateAttr,
+    model_validator,
+    Field,
+    ConfigDict,
+    field_serializer,
+)
 
 
 class Region(str, Enum):
@@ -10,9 +17,19 @@ class Region(str, Enum):
     na = "na"
 
 
+DEFAULT_MEDAL_IMAGE = "https://example.com/default-image.png"
+# Картинки медалей по имени, заполняет справочник (utils/service/catalog.py)
+_medal_images: dict[str, str | None] = {}
+
+
+def set_medal_images(images: dict[str, str | None]):
+    global _medal_images
+    _medal_images = images
+
+
 class Medal(BaseModel):
     name: str
-    image: str = "undefined"
+    image: str | None = None
     count: int
 
     def __sub__(self, other):
@@ -21,19 +38,39 @@ class Medal(BaseModel):
         count = self.count - other.count
         return self.model_copy(update={"count": count}, deep=True)
 
+    @field_serializer("image")
+    def join_image(self, image: str | None) -> str:
+        # в снимках хранятся только счётчики, картинка берётся при ответе
+        return image or _medal_images.get(self.name) or DEFAULT_MEDAL_IMAGE
+
 
 class Medals(BaseModel):
     medals: list[Medal] = []
 
+    @classmethod
+    def from_counts(cls, counts: dict[str, int]) -> "Medals":
+        return cls(
+            medals=[Medal(name=name, count=count) for name, count in counts.items()]
+        )
+
+    @staticmethod
+    def diff(now: dict[str, int], old: dict[str, int]) -> dict[str, int]:
+        """Только медали, число которых изменилось."""
+        return {
+            name: count - old.get(name, 0)
+            for name, count in now.items()
+            if count != old.get(name, 0)
+        }
+
     def __sub__(self, other):
         if not isinstance(other, Medals):
             return NotImplemented
-        medals = []
         other_medals = {element.name: element for element in other.medals}
+        medals = []
         for medal in self.medals:
             if medal.name in other_medals:
-                medals.append(medal - other_medals[medal.name])
-            else:
+                medal = medal - other_medals[medal.name]
+            if medal.count:
                 medals.append(medal)
         return self.model_copy(update={"medals": medals}, deep=True)
 
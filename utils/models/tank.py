@@ -274,3 +274,16 @@ class PlayerModel(BaseModel, Session, StrMixin):
             private=private,
             general=general,
         )
+
+
+# Участник клана: профиль полей clan-member, приватных данных нет
+class MemberModel(PlayerModel):
+    private: Private | None = None
+
+
+# Профиль change-check: только то, по чему видно что игрок сыграл
+class PlayerActivity(BaseModel):
+    account_id: int
+    nickname: str
+    last_battle_time: int = 0
+    updated_at: int = 0
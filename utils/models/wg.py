@@ -0,0 +1,37 @@
+from functools import cache
+from typing import Any, Generic, TypeVar
+
+from pydantic import BaseModel
+
+from utils.models.tank import Tank
+
+T = TypeVar("T")
+
+
+class WGError(BaseModel):
+    message: str
+    value: Any = None
+
+
+class WGMeta(BaseModel):
+    count: int | None = None
+
+
+class WGResponse(BaseModel, Generic[T]):
+    """Ответ WG API. Разбирается из байтов ответа сразу в модели,
+    без промежуточных dict."""
+
+    status: str
+    error: WGError | None = None
+    meta: WGMeta | None = None
+    data: T | None = None
+
+
+# tanks/stats: {account_id: [Tank, ...] | null}
+TankStatsResponse = WGResponse[dict[str, list[Tank] | None]]
+
+
+@cache
+def account_response(model: type[BaseModel]) -> type[WGResponse]:
+    """account/info: {account_id: model | null}"""
+    return WGResponse[dict[str, model | None]]
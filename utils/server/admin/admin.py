@@ -79,6 +79,22 @@ async def info(
     return await service.collect_all(limit=limit)
 
 
+@router.get("/indexes")
+async def indexes(requests: Request, current_user=Depends(is_admin_valid)):
+    """Использование индексов Mongo по коллекциям ($indexStats)."""
+    service = MetricsInterface(requests.app.state.time)
+    return await service.get_index_stats()
+
+
+@router.get("/slow_queries")
+async def slow_queries(
+    requests: Request, limit: int = 50, current_user=Depends(is_admin_valid)
+):
+    """Медленные команды Mongo с фильтром и планом выполнения."""
+    service = MetricsInterface(requests.app.state.time)
+    return await service.get_slow_queries(limit)
+
+
 @router.get("/task/{task_id}")
 async def get_task(task_id: str, current_user=Depends(is_admin_valid)):
     task_text = await redis_cache.get(task_id)
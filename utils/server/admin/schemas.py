@@ -16,6 +16,12 @@ class AdminStats(BaseModel):
     active_users_list: list[RestUserDB]
     external_api_calls: int
     custom_api_calls: dict[str, int]
+    single_flight: dict[str, dict[str, int]]
+    limiters: dict[str, dict[str, float]]
+    breakers: dict[str, dict[str, str | int]]
+    app_ids: list[dict]
+    resolver: dict[str, int]
+    admission: dict[str, dict[str, int]]
     last_1000_logs: list[dict]
 
 
@@ -37,6 +43,7 @@ class Commands(str, Enum):
     UPDATE_CLAN_DB = "update_clan_db"
     UPDATE_PLAYER_ALL_DB = "update_player_all_db"
     UPDATE_CLAN_ALL_DB = "update_clan_all_db"
+    BACKFILL_DAILY = "backfill_daily"
 
 
 class ResetPlayerArgs(BaseModel):
@@ -60,6 +67,7 @@ COMMAND_ARGS: dict[Commands, type[BaseModel]] = {
     Commands.UPDATE_CLAN_DB: EmptyArgs,
     Commands.UPDATE_PLAYER_ALL_DB: EmptyArgs,
     Commands.UPDATE_CLAN_ALL_DB: EmptyArgs,
+    Commands.BACKFILL_DAILY: EmptyArgs,
 }
 
 
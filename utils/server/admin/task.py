@@ -5,6 +5,7 @@ from utils.interface.player import PlayerSession
 from utils.interface.task import TaskInterface
 from utils.server.admin.schemas import Commands
 import asyncio
+import contextvars
 
 COMMAND_REGISTRY: dict[Commands, Callable[..., Awaitable]] = {}
 
@@ -21,7 +22,10 @@ async def _update_db(entity_cls_or_method, *, _all=True, use_task=False, flag=No
     if use_task:
         interface = TaskInterface()
         task = await interface.create_task(flag=flag)
-        asyncio.create_task(entity_cls_or_method(task.id, _all=_all))
+        # пустой контекст: без срока HTTP запроса, который запустил задачу
+        asyncio.create_task(
+            entity_cls_or_method(task.id, _all=_all), context=contextvars.Context()
+        )
         return task
     return await entity_cls_or_method(_all=_all)
 
@@ -66,3 +70,13 @@ async def task_update_player_all_db():
     return await _update_db(
         TaskInterface().update_player_db, _all=True, use_task=True, flag="player"
     )
+
+
+@register_command(Commands.BACKFILL_DAILY)
+async def task_backfill_daily():
+    interface = TaskInterface()
+    task = await interface.create_task(flag="daily")
+    asyncio.create_task(
+        interface.backfill_daily(task.id), context=contextvars.Context()
+    )
+    return task
@@ -8,13 +8,28 @@ from ...models.clan import ClanDB, RestClan, ClanTop
 from ...error import *
 
 from utils.cache.redis_cache import redis_cache
+from utils.api.admission import admission
+from utils.settings.config import EnvConfig
 
 router = APIRouter(tags=["clan"])
 
 
 @router.get("/{region}/clan/", response_model=RestClan)
 async def get_clan_session(region: Region, name: str):
-    return await ClanInterface(name=name, region=region.value).results()
+    params = {"name": name.lower(), "region": region.value}
+    # кеша нет: прошлый результат отдаётся только при перегрузке
+    if stale := await admission.admit(
+        "clan",
+        region.value,
+        cost=2,
+        stale=lambda: redis_cache.get_stale("clan_session", **params),
+    ):
+        return stale
+    result = await ClanInterface(name=name, region=region.value).results()
+    await redis_cache.set_stale(
+        "clan_session", result, EnvConfig.STALE_CACHE_TTL, **params
+    )
+    return result
 
 
 @router.get("/clan/search")
@@ -22,6 +22,8 @@ from ...models.response_model import Parameter, Region, RestUser, RestUserDB, To
 from ...error import NotFoundPlayerDB
 
 from utils.cache.redis_cache import redis_cache
+from utils.api.admission import admission
+from utils.settings.config import EnvConfig
 
 
 router = APIRouter(tags=["player"])
@@ -103,17 +105,25 @@ async def get_general(region: Region, name: str, token: str = Depends(get_token)
 async def get_session(
     region: Region, name: str, token: str = Depends(get_token)
 ) -> RestUser:
+    params = {"name": name, "region": region.value}
     try:
         return await redis_cache.cache_or_compute(
             "get_session",
             60,
             PlayerSession(name=name, reg=region.value, access_token=token).results,
-            name=name,
-            region=region.value,
+            stale_expire=EnvConfig.STALE_CACHE_TTL,
+            # очередь к WG слишком длинная: отдаём прошлый результат или 503
+            admit=lambda: admission.admit(
+                "get_session",
+                region.value,
+                cost=3,
+                stale=lambda: redis_cache.get_stale("get_session", **params),
+            ),
+            **params,
         )
 
     except NotFoundPlayerDB:
-        asyncio.create_task(PlayerSession(name=name, reg=region.value).add_player())
+        PlayerSession(name=name, reg=region.value).add_player_background()
         raise NotFoundPlayerDB(region=region.value, name=name)
 
 
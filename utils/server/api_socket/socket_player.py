@@ -1,7 +1,12 @@
 import asyncio
 from fastapi import APIRouter, WebSocket
 
+from utils.api.admission import admission
+from utils.api.deadline import deadline
+from utils.api.limiter import Priority, set_priority
 from utils.models.response_model import Region
+from utils.error import Overloaded
+from utils.settings.config import EnvConfig
 from ...interface.player import PlayerSession
 
 
@@ -11,8 +16,24 @@ router = APIRouter(prefix="/ws")
 @router.websocket("/{name}")
 async def websocket_endpoint(websocket: WebSocket, region: Region, name: str):
     await websocket.accept()
+    set_priority(Priority.WEBSOCKET, flow=(region, name))
     player = PlayerSession(name=name, reg=region)
+    data, last_battle_time = None, None
     while True:
-        data = await player.results()
+        with deadline(EnvConfig.REQUEST_DEADLINE):
+            try:
+                # при перегрузке пропускаем тик и отдаём прошлый результат
+                await admission.admit("websocket", region, cost=1)
+            except Overloaded as e:
+                if data is None:
+                    # отдавать ещё нечего: соединение не рвём, пробуем позже
+                    await asyncio.sleep(int(e.headers["Retry-After"]))
+                    continue
+            else:
+                # пересчитываем сессию только если игрок сыграл бой
+                activity = await player.session.get_activity(player.user)
+                if data is None or activity.last_battle_time != last_battle_time:
+                    data = await player.results()
+                    last_battle_time = activity.last_battle_time
         await websocket.send_json(data.model_dump())
         await asyncio.sleep(60)
@@ -18,8 +18,11 @@ from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.cron import CronTrigger
 from ..interface.player import PlayerSession
 from ..interface.clan import ClanInterface
+from ..interface.encyclopedia import EncyclopediaInterface
 from ..database.admin import initialize_db
-from .middleware import ExceptionLoggingMiddleware
+from ..database.Mongo import ensure_indexes
+from ..service.catalog import catalog
+from .middleware import DeadlineMiddleware, ExceptionLoggingMiddleware
 from ..error.exception import *
 from ..settings.logger import LoggerFactory
 from ..api.wotb import APIServer
@@ -29,12 +32,20 @@ from ..api.wotb import APIServer
 async def lifespan(app: FastAPI):
     scheduler = AsyncIOScheduler()
     initialize_db()
+    await ensure_indexes()
+    await catalog.load()
     app.state.scheduler = scheduler
     app.state.time = time.time()
     server = APIServer()
     await server.init_session()
     trigger = CronTrigger(hour=12, minute=10, second=00)
     trigger_clan = CronTrigger(day_of_week="mon", hour=12, minute=10)
+    # до ночного обновления, чтобы оно пропустило неактивных игроков
+    scheduler.add_job(
+        PlayerSession.archive_dormant,
+        trigger=CronTrigger(hour=12, minute=0, second=0),
+        misfire_grace_time=3600 * 6,
+    )
     scheduler.add_job(
         PlayerSession.update_player_db,
         args=[False],
@@ -58,6 +69,11 @@ async def lifespan(app: FastAPI):
         trigger=trigger_clan,
         misfire_grace_time=3600 * 6,
     )
+    scheduler.add_job(
+        EncyclopediaInterface.sync,
+        trigger=CronTrigger(day_of_week="wed", hour=12, minute=0),
+        misfire_grace_time=3600 * 6,
+    )
     LoggerFactory.log("Start scheduler job")
     scheduler.start()
     yield
@@ -74,6 +90,7 @@ origins = [
 ]
 mid = [
     Middleware(ExceptionLoggingMiddleware),
+    Middleware(DeadlineMiddleware),
     Middleware(
         CORSMiddleware,
         allow_origins=["*"],
@@ -126,7 +143,11 @@ def create_exception_handler(status_code: int, initial_detail: str) -> Callable:
         else:
             LoggerFactory.log(str(exc), level="CRITICAL")
 
-        return JSONResponse(status_code=status_code, content={"detail": message})
+        return JSONResponse(
+            status_code=status_code,
+            content={"detail": message},
+            headers=getattr(exc, "headers", None),
+        )
 
     return exception_handler
 
@@ -1,6 +1,7 @@
 from http import client
 from fastapi import APIRouter, Body, Depends, Header
 from fastapi.security import APIKeyHeader
+from utils.api.limiter import Priority, set_priority
 from utils.interface import admin
 from utils.interface.client import ClientInterface
 from utils.models.response_model import Region, RestUser
@@ -8,10 +9,16 @@ from utils.server.client.schemas import CreateResponse, SessionResetRequest
 from utils.database.admin import valid
 from loguru import logger as log
 
-client_router = APIRouter(prefix="/client", tags=["client"])
+api_key_scheme = APIKeyHeader(name="X-Token", auto_error=True)
 
 
-api_key_scheme = APIKeyHeader(name="X-Token", auto_error=True)
+async def client_priority(token: str = Depends(api_key_scheme)):
+    set_priority(Priority.CLIENT, flow=token)
+
+
+client_router = APIRouter(
+    prefix="/client", tags=["client"], dependencies=[Depends(client_priority)]
+)
 
 
 def get_permissions(token: str = Depends(api_key_scheme)):
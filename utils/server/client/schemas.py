@@ -1,11 +1,20 @@
 from datetime import datetime
-from pydantic import BaseModel
+from pydantic import BaseModel, field_validator
 
 from utils.models.player import UserDB
+from utils.models.response_model import Medals
 
 
 class CreateResponse(UserDB):
     session_id: str
+    # в ответе медали списком с картинками, как в RestUser
+    medal: Medals = Medals()
+
+    @field_validator("medal", mode="before")
+    def legacy_medals(cls, v):
+        if isinstance(v, dict) and not isinstance(v.get("medals"), list):
+            return Medals.from_counts(v)
+        return v
 
 
 class SessionResetRequest(BaseModel):
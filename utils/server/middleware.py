@@ -4,6 +4,9 @@ from starlette.middleware.base import BaseHTTPMiddleware
 from starlette.requests import Request
 
 import time
+from ..api.deadline import deadline
+from ..api.limiter import Priority, set_priority
+from ..settings.config import EnvConfig
 from ..settings.logger import LoggerFactory
 
 http_requests_total = Counter("http_requests", "Total HTTP requests", ["path"])
@@ -27,3 +30,18 @@ class ExceptionLoggingMiddleware(BaseHTTPMiddleware):
             extra={"duration": time.time() - start, "method": request.method},
         )
         return response
+
+
+class DeadlineMiddleware(BaseHTTPMiddleware):
+    """Задаёт срок на обработку запроса и очередь клиента в limiter,
+    их наследуют все вызовы WG."""
+
+    def __init__(self, app, seconds: float = EnvConfig.REQUEST_DEADLINE):
+        super().__init__(app)
+        self.seconds = seconds
+
+    async def dispatch(self, request: Request, call_next):
+        client = request.client.host if request.client else None
+        set_priority(Priority.INTERACTIVE, flow=client)
+        with deadline(self.seconds):
+            return await call_next(request)
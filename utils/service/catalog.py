@@ -0,0 +1,107 @@
+import asyncio
+import json
+import time
+
+from pydantic import ValidationError
+from pymongo.errors import PyMongoError
+from redis.exceptions import RedisError
+
+from utils.cache.redis_cache import RedisCache, redis_cache
+from utils.database.Mongo import Medal_DB, Tank_DB
+from utils.models.encyclopedia import VehicleInfo
+from utils.models.response_model import ItemTank, set_medal_images
+from utils.settings.config import EnvConfig
+from utils.settings.logger import LoggerFactory
+
+VERSION_KEY = "catalog:version"
+
+
+class Catalog:
+    """Справочники техники и медалей в памяти воркера.
+
+    Загружаются целиком из Tank_DB/Medal_DB, картинки медалей отдаются
+    в ответы через set_medal_images. После изменения справочников
+    publish() меняет версию в Redis; воркеры сверяют её не чаще
+    CATALOG_CHECK_INTERVAL секунд и перечитывают справочники.
+    """
+
+    def __init__(self, cache: RedisCache, check_interval: float):
+        self.cache = cache
+        self.check_interval = check_interval
+        self.tanks: dict[int, VehicleInfo] = {}
+        self.medals: dict[str, str | None] = {}
+        self.version: str | None = None
+        self._loaded = False
+        self._checked = 0.0
+        self._lock = asyncio.Lock()
+
+    async def _remote_version(self) -> str | None:
+        try:
+            return await self.cache.get(VERSION_KEY)
+        except (RedisError, OSError) as e:
+            LoggerFactory.log(f"Версия справочников недоступна: {e}", level="WARNING")
+            return self.version
+
+    async def load(self, version: str | None = None):
+        async with self._lock:
+            try:
+                tank_docs = await Tank_DB.collection.find(
+                    {}, projection={"_id": 0, "hash": 0, "admin": 0}
+                ).to_list(length=None)
+                medal_docs = await Medal_DB.collection.find(
+                    {}, projection={"_id": 0, "name": 1, "image": 1}
+                ).to_list(length=None)
+            except PyMongoError as e:
+                LoggerFactory.log(f"Справочники не загружены: {e}", level="ERROR")
+                return
+            tanks = {}
+            for doc in tank_docs:
+                try:
+                    tank = VehicleInfo.model_validate(doc)
+                except ValidationError:
+                    continue
+                tanks[tank.tank_id] = tank
+            self.tanks = tanks
+            self.medals = {doc["name"]: doc.get("image") for doc in medal_docs}
+            set_medal_images(self.medals)
+            self.version = (
+                version if version is not None else await self._remote_version()
+            )
+            self._loaded = True
+            self._checked = time.monotonic()
+        LoggerFactory.log(
+            f"Справочники: техника {len(self.tanks)}, медали {len(self.medals)}, "
+            f"версия {self.version}"
+        )
+
+    async def ensure_fresh(self):
+        if time.monotonic() - self._checked < self.check_interval:
+            return
+        self._checked = time.monotonic()
+        version = await self._remote_version()
+        if not self._loaded or version != self.version:
+            await self.load(version)
+
+    async def publish(self):
+        """Сообщает всем воркерам, что справочники изменились."""
+        version = str(time.time_ns())
+        try:
+            await self.cache.set(VERSION_KEY, json.dumps(version), expire=None)
+        except (RedisError, OSError) as e:
+            LoggerFactory.log(f"Версия справочников не записана: {e}", level="ERROR")
+        await self.load(version)
+
+    def fill_tanks(self, items: list[ItemTank] | None):
+        """Дописывает к статистике танков название, нацию, уровень и картинки."""
+        for item in items or ():
+            tank = self.tanks.get(item.tank_id)
+            if tank is None:
+                continue
+            item.name = tank.name
+            item.nation = tank.nation
+            item.level = tank.tier
+            item.is_premium = tank.is_premium
+            item.images = tank.images
+
+
+catalog = Catalog(redis_cache, EnvConfig.CATALOG_CHECK_INTERVAL)
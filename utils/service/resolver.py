@@ -0,0 +1,162 @@
+import time
+from collections import OrderedDict
+
+from pymongo.errors import PyMongoError
+from redis.exceptions import RedisError
+
+from utils.api.app_pool import REGION_ALIASES
+from utils.cache.redis_cache import RedisCache
+from utils.database.Mongo import Entity_DB
+from utils.settings.config import EnvConfig
+from utils.settings.logger import LoggerFactory
+
+PLAYER = "player"
+CLAN_NAME = "clan_name"
+CLAN_TAG = "clan_tag"
+
+
+class LRUCache:
+    """Небольшой LRU с TTL на запись, живёт в памяти воркера."""
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: OrderedDict[tuple, tuple[float, int]] = OrderedDict()
+
+    def get(self, key: tuple) -> int | None:
+        item = self._data.get(key)
+        if item is None:
+            return None
+        expires, value = item
+        if expires < time.monotonic():
+            del self._data[key]
+            return None
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key: tuple, value: int):
+        self._data[key] = (time.monotonic() + self.ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def delete(self, key: tuple):
+        self._data.pop(key, None)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class EntityResolver:
+    """Ник игрока и имя/тег клана -> id без запроса к WG.
+
+    Порядок поиска: LRU воркера, Redis, коллекция Entity в Mongo.
+    Найденное на нижнем уровне поднимается в верхние. Если при запросе
+    к WG видно что игрок или клан переименован, старый ключ удаляется.
+    Недоступность Redis или Mongo не ломает поиск — идём в WG.
+    """
+
+    def __init__(
+        self,
+        cache: RedisCache | None = None,
+        maxsize: int = EnvConfig.RESOLVER_LRU_SIZE,
+        local_ttl: float = EnvConfig.RESOLVER_LOCAL_TTL,
+        ttl: int = EnvConfig.RESOLVER_TTL,
+        db_ttl: int = EnvConfig.RESOLVER_DB_TTL,
+    ):
+        self.cache = cache or RedisCache()
+        self.local = LRUCache(maxsize, local_ttl)
+        self.ttl = ttl
+        self.db_ttl = db_ttl
+        self.hits = {"local": 0, "redis": 0, "mongo": 0, "miss": 0}
+
+    @staticmethod
+    def key(kind: str, region: str, name: str) -> tuple[str, str, str]:
+        region = region.lower()
+        return kind, REGION_ALIASES.get(region, region), name.strip().lower()
+
+    @staticmethod
+    def redis_key(key: tuple[str, str, str]) -> str:
+        return "resolve:" + ":".join(key)
+
+    @staticmethod
+    def _warn(layer: str, e: Exception):
+        LoggerFactory.log(
+            f"Кеш id ({layer}) недоступен: {e!r}", level="WARNING", channel="api"
+        )
+
+    async def get(self, kind: str, region: str, name: str) -> int | None:
+        key = self.key(kind, region, name)
+        entity_id = self.local.get(key)
+        if entity_id is not None:
+            self.hits["local"] += 1
+            return entity_id
+        try:
+            entity_id = await self.cache.get(self.redis_key(key))
+        except (RedisError, OSError) as e:
+            self._warn("redis", e)
+        if entity_id is not None:
+            self.hits["redis"] += 1
+            self.local.set(key, entity_id)
+            return entity_id
+        try:
+            entity_id = await Entity_DB.get(
+                *key, newer_than=int(time.time()) - self.db_ttl
+            )
+        except PyMongoError as e:
+            self._warn("mongo", e)
+        if entity_id is not None:
+            self.hits["mongo"] += 1
+            await self._set_cache(key, entity_id)
+            return entity_id
+        self.hits["miss"] += 1
+        return None
+
+    async def _set_cache(self, key: tuple[str, str, str], entity_id: int):
+        self.local.set(key, entity_id)
+        try:
+            await self.cache.set(self.redis_key(key), str(entity_id), expire=self.ttl)
+        except (RedisError, OSError) as e:
+            self._warn("redis", e)
+
+    async def set(self, kind: str, region: str, name: str, entity_id: int):
+        key = self.key(kind, region, name)
+        if self.local.get(key) == entity_id:
+            return
+        await self._set_cache(key, entity_id)
+        try:
+            await Entity_DB.add(*key, entity_id=entity_id, ts=int(time.time()))
+        except PyMongoError as e:
+            self._warn("mongo", e)
+
+    async def forget(
+        self, kind: str, region: str, name: str, entity_id: int | None = None
+    ) -> bool:
+        """Удаляет ключ. С entity_id — только если ключ указывает на него."""
+        if entity_id is not None and await self.get(kind, region, name) != entity_id:
+            return False
+        key = self.key(kind, region, name)
+        self.local.delete(key)
+        try:
+            await self.cache.delete(self.redis_key(key))
+        except (RedisError, OSError) as e:
+            self._warn("redis", e)
+        try:
+            await Entity_DB.delete(*key)
+        except PyMongoError as e:
+            self._warn("mongo", e)
+        return True
+
+    async def rename(self, kind: str, region: str, old: str, new: str, entity_id: int):
+        """Ключ `old` больше не указывает на entity_id, теперь это `new`."""
+        if old and old.strip().lower() != new.strip().lower():
+            if await self.forget(kind, region, old, entity_id):
+                LoggerFactory.log(
+                    f"Переименование {kind} {entity_id}: {old} -> {new}",
+                    level="INFO",
+                    channel="api",
+                )
+        await self.set(kind, region, new, entity_id)
+
+    def stats(self) -> dict[str, int]:
+        return {"size": len(self.local), **self.hits}
@@ -0,0 +1,86 @@
+import asyncio
+import copy
+from typing import Any, Awaitable, Callable, Hashable
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from prometheus_client import Counter
+
+single_flight_counter = Counter(
+    "single_flight_requests",
+    "Calls that started work (miss) or joined an in-flight call (hit)",
+    ["scope", "result"],
+)
+
+
+def normalize_url(url: str, exclude: set[str] = frozenset()) -> str:
+    """Канонический вид url: без параметров из exclude и с отсортированными
+    остальными параметрами. Значения параметров не меняются."""
+    parts = urlsplit(url)
+    query = urlencode(
+        sorted(
+            (key, value)
+            for key, value in parse_qsl(parts.query, keep_blank_values=True)
+            if key not in exclude
+        )
+    )
+    return urlunsplit(
+        (parts.scheme, parts.netloc.lower(), parts.path, query, parts.fragment)
+    )
+
+
+class SingleFlight:
+    """Объединяет одновременные одинаковые вызовы в один.
+
+    Пока вызов с ключом выполняется, остальные вызовы с тем же ключом
+    ждут его результат вместо того чтобы запускать свой. Если к вызову
+    кто-то присоединился, каждый получает свою глубокую копию результата.
+    """
+
+    def __init__(self, scope: str):
+        self.scope = scope
+        self._inflight: dict[Hashable, asyncio.Future] = {}
+        self._joined: dict[Hashable, int] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._inflight
+
+    async def do(self, key: Hashable, func: Callable[[], Awaitable[Any]]) -> Any:
+        future = self._inflight.get(key)
+        if future is not None:
+            self.hits += 1
+            single_flight_counter.labels(scope=self.scope, result="hit").inc()
+            self._joined[key] = self._joined.get(key, 0) + 1
+            try:
+                return copy.deepcopy(await asyncio.shield(future))
+            except asyncio.CancelledError:
+                # отменили вызов-владелец, а не нас: выполняем сами
+                if future.cancelled():
+                    return await self.do(key, func)
+                raise
+
+        self.misses += 1
+        single_flight_counter.labels(scope=self.scope, result="miss").inc()
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            result = await func()
+        except BaseException as e:
+            if isinstance(e, asyncio.CancelledError):
+                future.cancel()
+            else:
+                future.set_exception(e)
+                # исключение уже получил владелец вызова
+                future.exception()
+            raise
+        else:
+            future.set_result(result)
+            # в future остаётся нетронутый результат для присоединившихся
+            return copy.deepcopy(result) if self._joined.get(key) else result
+        finally:
+            del self._inflight[key]
+            self._joined.pop(key, None)
+
+    def stats(self) -> dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses}
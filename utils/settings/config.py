@@ -25,8 +25,56 @@ class Config(Singleton):
 
 class EnvConfig:
     LIMIT = int(os.getenv("LIMIT", "10"))
+    LIMIT_MIN = float(os.getenv("LIMIT_MIN", "1"))
+    LIMIT_MAX = float(os.getenv("LIMIT_MAX", os.getenv("LIMIT", "10")))
+    LIMIT_INCREASE = float(os.getenv("LIMIT_INCREASE", "0.05"))
+    LIMIT_DECREASE = float(os.getenv("LIMIT_DECREASE", "0.5"))
+    REDIS_LIMITER = os.getenv("REDIS_LIMITER", "false").lower() in ("1", "true")
+    REDIS_LIMITER_BURST = int(
+        os.getenv("REDIS_LIMITER_BURST", os.getenv("LIMIT", "10"))
+    )
+    REDIS_LIMITER_PREFETCH = int(os.getenv("REDIS_LIMITER_PREFETCH", "2"))
+    RETRY_ATTEMPTS = int(os.getenv("RETRY_ATTEMPTS", "3"))
+    RETRY_BASE_DELAY = float(os.getenv("RETRY_BASE_DELAY", "0.5"))
+    RETRY_MAX_DELAY = float(os.getenv("RETRY_MAX_DELAY", "10"))
+    RETRY_JITTER = float(os.getenv("RETRY_JITTER", "1"))
+    API_TIMEOUT = float(os.getenv("API_TIMEOUT", "30"))
+    REQUEST_DEADLINE = float(os.getenv("REQUEST_DEADLINE", "20"))
+    RATING_TIMEOUT = float(os.getenv("RATING_TIMEOUT", "2"))
+    RATING_CACHE_FRESH = int(os.getenv("RATING_CACHE_FRESH", "3600"))
+    RATING_CACHE_TTL = int(os.getenv("RATING_CACHE_TTL", str(3 * 86400)))
+    # доля оставшегося срока запроса, которую можно провести в очереди limiter
+    ADMISSION_HEADROOM = float(os.getenv("ADMISSION_HEADROOM", "0.8"))
+    # Сколько живёт прошлый ответ, который отдаётся при перегрузке
+    STALE_CACHE_TTL = int(os.getenv("STALE_CACHE_TTL", "3600"))
+    BREAKER_FAILURES = int(os.getenv("BREAKER_FAILURES", "5"))
+    BREAKER_RESET_TIMEOUT = float(os.getenv("BREAKER_RESET_TIMEOUT", "30"))
     WG_APP_IDS = os.getenv("WG_APP_IDS", "6af85f38c69d69fc6c392514dc642129")
     LT_APP_IDS = os.getenv("LT_APP_IDS")
+    # Через сколько секунд выведенный из ротации application_id пробуется снова
+    APP_ID_COOLDOWN = float(os.getenv("APP_ID_COOLDOWN", "600"))
+    # Адрес заглушки WG API (scripts/fake_wg.py) для нагрузочных прогонов
+    WG_API_BASE = os.getenv("WG_API_BASE")
+    # Кеш ник/клан -> id: локальный LRU, Redis и Mongo
+    RESOLVER_LRU_SIZE = int(os.getenv("RESOLVER_LRU_SIZE", "50000"))
+    RESOLVER_LOCAL_TTL = int(os.getenv("RESOLVER_LOCAL_TTL", "3600"))
+    RESOLVER_TTL = int(os.getenv("RESOLVER_TTL", str(30 * 86400)))
+    RESOLVER_DB_TTL = int(os.getenv("RESOLVER_DB_TTL", str(180 * 86400)))
+    # Буфер записи фоновых задач: сброс по размеру очереди или по таймеру
+    BULK_WRITE_SIZE = int(os.getenv("BULK_WRITE_SIZE", "500"))
+    BULK_WRITE_INTERVAL = float(os.getenv("BULK_WRITE_INTERVAL", "5"))
+    # Число диапазонов _id, которые фоновые задачи читают параллельно
+    SCAN_PARTITIONS = int(os.getenv("SCAN_PARTITIONS", "4"))
+    # Срок жизни непрочитанных /client сессий и порог архивации игроков
+    CLIENT_SESSION_TTL = int(os.getenv("CLIENT_SESSION_TTL", str(30 * 86400)))
+    PLAYER_ARCHIVE_DAYS = int(os.getenv("PLAYER_ARCHIVE_DAYS", "30"))
+    # Как часто чтение документа обновляет его last_access
+    ACCESS_TOUCH_INTERVAL = int(os.getenv("ACCESS_TOUCH_INTERVAL", "3600"))
+    # Команды Mongo дольше порога попадают в /admin/slow_queries
+    MONGO_SLOW_MS = float(os.getenv("MONGO_SLOW_MS", "100"))
+    MONGO_SLOW_BUFFER = int(os.getenv("MONGO_SLOW_BUFFER", "200"))
+    # Как часто воркер сверяет версию справочников техники и медалей
+    CATALOG_CHECK_INTERVAL = float(os.getenv("CATALOG_CHECK_INTERVAL", "30"))
     SECRET_KEY = os.getenv("SECRET_KEY", "SECRET_KEY")
     ALGORITHM = os.getenv("ALGORITHM", "HS256")
     ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "360"))